@@ -0,0 +1,171 @@
+"""Benchmarks of pairwise tool on synthetic parameter models"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import click
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from main.api import InvalidOption, get_engine  # noqa: E402
+
+# Absolute increase of time in seconds and peak memory in bytes which is never reported as regression
+RESOURCE_TOLERANCE = {"seconds": 0.25, "peak_memory": 2**16}
+
+
+def create_model(sizes, weights=None):
+    """
+    :param sizes: List of (number of values, number of kinds) tuples, e.g. [(4, 15), (3, 17)] for 4^15 x 3^17
+    :param weights: Weights of values, value j of kind i is named k{i}v{j}
+    :return: Parameters in the same format as loaded input file
+    """
+    parameters = {}
+    for size, count in sizes:
+        for _ in range(count):
+            kind = len(parameters)
+            parameters[f"K{kind}"] = [f"k{kind}v{value}" for value in range(size)]
+    model = {"Parameters": parameters}
+    if weights:
+        model["Weights"] = weights
+    return model
+
+
+MODELS = {
+    "2^100": create_model([(2, 100)]),
+    "3^13": create_model([(3, 13)]),
+    "4^15x3^17x2^29": create_model([(4, 15), (3, 17), (2, 29)]),
+    "10^20": create_model([(10, 20)]),
+    "3^13-weighted": create_model([(3, 13)], {"k0v0": 3, "k1v1": 2, "k2v2": 0.5}),
+    "4^15x3^17x2^29-weighted": create_model([(4, 15), (3, 17), (2, 29)], {"k0v0": 2, "k20v1": 3, "k40v0": 0.5}),
+    "3^13-zero-weight": create_model([(3, 13)], {"k0v0": 0}),
+    "2^20-zero-weight": create_model([(2, 20)], {"k0v0": 0}),
+}
+
+
+def run(engine, model, max_configurations):
+    """
+    Generate configurations of given model
+    :param engine: Pairwise class used for generation
+    :param model: Parameters in the same format as loaded input file
+    :param max_configurations: Generation is stopped once this number of configurations is generated
+    :return: Generator after generation and number of configurations added after all pairs were covered
+    """
+    pairwise = engine(model, None)
+    ratio_iterations = 0
+    for _ in pairwise.iter_configurations():
+        if not pairwise.pairs:
+            ratio_iterations += 1
+        if len(pairwise.rows) >= max_configurations:
+            break
+    # Configuration which covered the last pairs is not part of ratio phase
+    return pairwise, max(0, ratio_iterations - 1)
+
+
+def measure(engine, model, max_configurations):
+    """
+    :return: Result of benchmark of given model, time is measured in separate run without tracemalloc
+    """
+    start = time.perf_counter()
+    pairwise, ratio_iterations = run(engine, model, max_configurations)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    run(engine, model, max_configurations)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "seconds": round(seconds, 3),
+        "peak_memory": peak,
+        "configurations": len(pairwise.rows),
+        "ratio_iterations": ratio_iterations,
+        "completed": bool(pairwise.generated_all),
+    }
+
+
+def compare(results, baseline, threshold=None):
+    """
+    :param results: Results of benchmarks
+    :param baseline: Stored results of benchmarks
+    :param threshold: Allowed relative increase of time and memory, they are not compared when not given
+    :return: List of regressions found in results
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        base = baseline[name]
+        if result["configurations"] > base["configurations"]:
+            regressions.append(f"{name}: configurations {base['configurations']} -> {result['configurations']}")
+        if base["completed"] and not result["completed"]:
+            regressions.append(f"{name}: generation did not complete")
+        if threshold is None:
+            continue
+        for metric, tolerance in RESOURCE_TOLERANCE.items():
+            # Absolute tolerance keeps noise of fast and small models from failing the run
+            if result[metric] > max(base[metric] * (1 + threshold), base[metric] + tolerance):
+                regressions.append(f"{name}: {metric} {base[metric]} -> {result[metric]}")
+    return regressions
+
+
+@click.command()
+@click.option("-o", "--output", help="JSON output file with results", type=click.File("w"))
+@click.option("-b", "--baseline", help="JSON file with stored results to compare with", type=click.File("r"))
+@click.option(
+    "-t",
+    "--threshold",
+    help="Allowed relative increase of time and memory against baseline (e.g. 0.5), they are compared only "
+    "when given, since they depend on machine",
+    type=click.FloatRange(min=0),
+)
+@click.option(
+    "--model",
+    "models",
+    help="Run only given model, can be used more times",
+    type=click.Choice(list(MODELS)),
+    multiple=True,
+)
+@click.option(
+    "--engine",
+    help="Generation engine, default is python",
+    type=click.Choice(["python", "numpy"]),
+    default="python",
+)
+@click.option(
+    "--strength",
+    help="Number of parameters of different kinds whose combinations are all covered, default is 2",
+    type=click.IntRange(min=2),
+    default=2,
+)
+@click.option(
+    "--max-configurations",
+    help="Generation of model is stopped after this number of configurations, default is 1000",
+    type=click.IntRange(min=1),
+    default=1000,
+)
+# pylint: disable=too-many-arguments,too-many-positional-arguments
+def main(output, baseline, threshold, models, engine, strength, max_configurations):
+    """Run benchmarks and compare them with baseline"""
+    results = {}
+    for name in models or MODELS:
+        try:
+            engine_class = get_engine(engine, strength, len(MODELS[name]["Parameters"]))
+        except InvalidOption as e:
+            raise click.UsageError(str(e)) from e
+        results[name] = measure(engine_class, MODELS[name], max_configurations)
+        click.echo(f"{name}: {results[name]}")
+    if output:
+        json.dump(results, output, indent=2)
+        output.write("\n")
+    if baseline:
+        regressions = compare(results, json.load(baseline), threshold)
+        for regression in regressions:
+            click.echo(f"Regression in {regression}", err=True)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
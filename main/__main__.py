@@ -0,0 +1,4 @@
+"""Pairwise tool run as python -m pairwise"""
+from .main import main
+
+main(prog_name="pairwise")
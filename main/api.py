@@ -0,0 +1,194 @@
+"""Library interface of pairwise tool, generates configurations without command line and files"""
+import functools
+import warnings
+
+from .constraints import ConstraintIndex
+from .multistart import generate_best
+from .pairwise import Pairwise
+from .parameters_check import ParametersCheck
+from .parameters_model import ParametersModel
+from .sharding import Sharding
+from .tuplewise import TuplewisePairwise
+
+
+# pylint: disable=too-many-arguments,too-many-positional-arguments
+def generate(
+    parameters,
+    margin=None,
+    engine="python",
+    strength=2,
+    restarts=1,
+    seed=None,
+    seed_configurations=None,
+    minimise=False,
+    compiled=None,
+):
+    """
+    Check parameters and generate all configurations. Combinations made impossible by constraints, weights
+    which can't be met and unfinished generation are reported as warnings, the same as in command line.
+    :param parameters: Parameters in the same format as loaded input file, e.g. {"Parameters": {"P1": [1, 2]}}
+    :param margin: Margin of weights, default is 0.05
+    :param engine: Name of generation engine, python or numpy
+    :param strength: Number of parameters of different kinds whose combinations are all covered
+    :param restarts: Number of generator runs with randomised tie-breaks, the smallest suite is kept
+    :param seed: Seed of randomised restarts
+    :param seed_configurations: Existing configurations as dictionaries of kinds and values which are extended
+    :param minimise: Remove redundant configurations and merge configurations which fit into one after generation
+    :param compiled: CompiledParameters of the same parameters reused by single run, they are compiled when not given
+    :return: List of configurations as dictionaries of kinds and values
+    """
+    ParametersCheck().check_model(parameters)
+    engine_class = get_engine(engine, strength, len(parameters["Parameters"]))
+    seed_configurations = seed_configurations or []
+    if restarts > 1:
+        pairwise, _ = generate_best(
+            engine_class, parameters, margin, restarts, seed=seed, configurations=seed_configurations
+        )
+    else:
+        pairwise = engine_class(parameters, margin, compiled=compiled)
+        pairwise.extend(seed_configurations)
+        pairwise.generate_configurations()
+    if minimise:
+        pairwise.minimise()
+    configurations = list(pairwise.configurations)
+    warn_impossible(implied_impossible(pairwise))
+    warn_unmet(unmet_weights(pairwise), pairwise.margin)
+    warn_uncovered(uncovered_combinations(pairwise))
+    if seed_configurations:
+        warn_completed(parameters, seed_configurations)
+    if not pairwise.generated_all:
+        warnings.warn("No more unique configuration meeting the requirements")
+    return configurations
+
+
+def generate_with_warnings(parameters, **options):
+    """
+    :param parameters: Parameters in the same format as loaded input file
+    :param options: Keyword arguments of generate function
+    :return: List of configurations and messages of warnings raised during generation
+    """
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        configurations = generate(parameters, **options)
+    return configurations, [str(warning.message) for warning in caught]
+
+
+def shard(configurations, count, costs=None):
+    """
+    Split configurations into shards of balanced cost, each covering as many pairs as possible
+    :param configurations: Configurations as dictionaries of kinds and values, e.g. returned by generate
+    :param count: Number of shards
+    :param costs: Cost of each configuration, every configuration costs 1 when not given
+    :return: List of shards, each one is list of its configurations in order of generation
+    """
+    sharding = Sharding([list(configuration.values()) for configuration in configurations], count, costs)
+    return [[configurations[row] for row in sharding.shard(index)] for index in range(count)]
+
+
+def get_engine(engine, strength=2, kinds=None):
+    """
+    :param engine: Name of generation engine
+    :param strength: Number of parameters of different kinds whose combinations are all covered
+    :param kinds: Number of parameter kinds, strength is not checked against it when not given
+    :return: Pairwise class of given engine
+    """
+    if kinds is not None and strength > kinds:
+        raise InvalidOption(f"Strength {strength} is greater than number of parameter kinds {kinds}.")
+    if strength > 2:
+        if engine == "numpy":
+            raise InvalidOption("Engine 'numpy' supports only strength 2.")
+        return functools.partial(TuplewisePairwise, strength=strength)
+    if engine == "numpy":
+        try:
+            # pylint: disable=import-outside-toplevel
+            from .numpy_engine import NumpyPairwise
+        except ImportError as e:
+            raise InvalidOption("Engine 'numpy' requires numpy package to be installed.") from e
+        return NumpyPairwise
+    if engine != "python":
+        raise InvalidOption(f"Engine '{engine}' doesn't exist.")
+    return Pairwise
+
+
+def implied_impossible(pairwise):
+    """
+    :param pairwise: Pairwise generator
+    :return: Labels of combinations of parameters which are not forbidden by constraints directly,
+    but are in no configuration allowed by them
+    """
+    return [
+        pairwise.model.label_combination(combination)
+        for combination in pairwise.impossible
+        if not pairwise.constraints.forbids(combination)
+    ]
+
+
+def warn_impossible(impossible):
+    """
+    Warn about combinations of parameters which can not be covered because of constraints
+    :param impossible: Labels of combinations
+    """
+    if not impossible:
+        return
+    shown = ", ".join(impossible[:10]) + (", ..." if len(impossible) > 10 else "")
+    warnings.warn(f"Constraints make {len(impossible)} combinations of parameters impossible to cover: {shown}")
+
+
+def uncovered_combinations(pairwise):
+    """
+    :param pairwise: Pairwise generator
+    :return: Labels of combinations of parameters which are allowed by constraints, but generated configurations
+    don't cover them
+    """
+    return [pairwise.model.label_combination(combination) for combination in pairwise.pairs]
+
+
+def warn_uncovered(uncovered):
+    """
+    Warn about combinations of parameters which could be covered, but generation ended before covering them
+    :param uncovered: Labels of combinations
+    """
+    if not uncovered:
+        return
+    shown = ", ".join(uncovered[:10]) + (", ..." if len(uncovered) > 10 else "")
+    warnings.warn(f"{len(uncovered)} combinations of parameters allowed by constraints are not covered: {shown}")
+
+
+def unmet_weights(pairwise):
+    """
+    :param pairwise: Pairwise generator
+    :return: Labels of parameters and their weights which are not met in generated configurations
+    """
+    weights = pairwise.model.weights
+    return [f"{pairwise.model.label(param)} ({weights[param] or 1})" for param in pairwise.unmet_weights]
+
+
+def warn_unmet(unmet, margin):
+    """
+    Warn about weights which can't be met in any suite of unique configurations
+    :param unmet: Labels of parameters with weights whose ratio in generated configurations is not within margin
+    :param margin: Margin of weights
+    """
+    if unmet:
+        warnings.warn(f"Weights of parameters {', '.join(unmet)} can not be met within margin {margin}")
+
+
+def warn_completed(parameters, seed_configurations):
+    """
+    Warn about configurations of seed suite which break constraints and were left out or had to be completed
+    :param parameters: Loaded input file with parameters and optional weights
+    :param seed_configurations: Existing configurations which were extended
+    """
+    model = ParametersModel(parameters)
+    constraints = ConstraintIndex(model, parameters.get("Constraints", []))
+    rows = [model.encode(configuration) for configuration in seed_configurations]
+    allowed = [row for row in rows if constraints.allows(row)]
+    if len(allowed) < len(rows):
+        warnings.warn(f"{len(rows) - len(allowed)} configurations of seed suite break constraints and were left out")
+    completed = sum(None in row for row in allowed)
+    if completed:
+        warnings.warn(f"{completed} configurations of seed suite were completed with values of changed parameters")
+
+
+class InvalidOption(Exception):
+    """Exception class for invalid generation option"""
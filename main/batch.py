@@ -0,0 +1,125 @@
+"""Batch generation of configurations for many parameter files in one process"""
+import csv
+import glob
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import click
+
+from .api import InvalidOption, generate_with_warnings
+from .parameters_check import ParametersCheck, ParametersError
+
+
+@click.command()
+@click.argument("inputs")
+@click.option(
+    "-o",
+    "--output-dir",
+    help="Directory of CSV outputs, default is directory of each parameter file",
+    type=click.Path(file_okay=False),
+)
+@click.option("-m", "--margin", help="Margin of weights, default is 0.05", type=click.FLOAT)
+@click.option(
+    "--engine",
+    help="Generation engine, default is python",
+    type=click.Choice(["python", "numpy"]),
+    default="python",
+)
+@click.option(
+    "--strength",
+    help="Number of parameters of different kinds whose combinations are all covered, default is 2",
+    type=click.IntRange(min=2),
+    default=2,
+)
+@click.option(
+    "--jobs",
+    help="Number of processes generating configurations of parameter files in parallel, default is 1",
+    type=click.IntRange(min=1),
+    default=1,
+)
+# pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+def batch(inputs, output_dir, margin, engine, strength, jobs):
+    """
+    Generate configurations of every parameter file in INPUTS, directory or glob pattern of JSON files.
+    Configurations of each file are written to CSV file with the same name.
+    """
+    paths = find_inputs(inputs)
+    if not paths:
+        raise click.UsageError(f"No parameter files match '{inputs}'.")
+    # Parameter files keep their paths relative to common directory, so files of the same name from
+    # different directories don't overwrite each other in output directory
+    base = os.path.commonpath([os.path.abspath(os.path.dirname(path)) for path in paths])
+    outputs = [output_path(path, output_dir, base) for path in paths]
+    for directory in {os.path.dirname(output) for output in outputs}:
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    options = {"margin": margin, "engine": engine, "strength": strength}
+    arguments = (paths, outputs, itertools.repeat(options))
+    if jobs > 1 and len(paths) > 1:
+        workers = min(jobs, len(paths))
+        # Small models take milliseconds, so files are sent to workers in chunks
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(process, *arguments, chunksize=max(1, len(paths) // (workers * 4))))
+    else:
+        results = list(map(process, *arguments))
+
+    failed = 0
+    for path, output, count, messages, error in results:
+        for message in messages:
+            click.echo(f"{path}: Warning: {message}", err=True)
+        if error:
+            failed += 1
+            click.echo(f"{path}: Error: {error}", err=True)
+        else:
+            click.echo(f"{path}: {count} configurations written to {output}")
+    if failed:
+        raise click.ClickException(f"{failed} of {len(paths)} parameter files failed.")
+
+
+def find_inputs(inputs):
+    """
+    :param inputs: Directory or glob pattern of parameter files
+    :return: Sorted paths of parameter files
+    """
+    if os.path.isdir(inputs):
+        inputs = os.path.join(inputs, "*.json")
+    return sorted(path for path in glob.glob(inputs, recursive=True) if os.path.isfile(path))
+
+
+def output_path(path, output_dir, base):
+    """
+    :param path: Path of parameter file
+    :param output_dir: Directory of CSV outputs, directory of parameter file when not given
+    :param base: Directory containing all parameter files, path of parameter file relative to it is kept
+    in output directory
+    :return: Path of CSV output of parameter file
+    """
+    name = os.path.splitext(os.path.basename(path))[0] + ".csv"
+    if not output_dir:
+        return os.path.join(os.path.dirname(path), name)
+    directory = os.path.relpath(os.path.abspath(os.path.dirname(path)), base)
+    return os.path.normpath(os.path.join(output_dir, directory, name))
+
+
+def process(path, output, options):
+    """
+    Check parameter file, generate its configurations and write them to CSV file
+    :param path: Path of parameter file
+    :param output: Path of CSV output
+    :param options: Keyword arguments of generate function
+    :return: Path of parameter file, path of CSV output, number of configurations, warnings
+    and error message, None if configurations were written
+    """
+    try:
+        with open(path, encoding="utf-8") as file:
+            check = ParametersCheck(file)
+            check.try_load()
+        configurations, messages = generate_with_warnings(check.file, **options)
+        with open(output, "w", encoding="utf-8", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(check.file["Parameters"])
+            writer.writerows(configuration.values() for configuration in configurations)
+    except (OSError, ParametersError, InvalidOption) as e:
+        return path, output, 0, [], str(e).strip()
+    return path, output, len(configurations), messages, None
@@ -0,0 +1,81 @@
+"""Lazy best-first enumeration of parameter combinations"""
+import heapq
+from fractions import Fraction
+
+
+def best_first_product(columns, key):
+    """
+    Yield combinations of cartesian product of columns in increasing order of exactly summed priority
+    of their items. Ties are yielded in the same order as by itertools.product. Combinations are expanded
+    lazily from a heap over columns sorted by priority, so memory depends on number of yielded combinations,
+    not on product size.
+    :param columns: Lists of items, one item of each list is used in combination
+    :param key: Function returning priority of single item
+    :return: Generator of tuples with one item of each column
+    """
+    if not all(columns):
+        return
+    # Priorities are summed exactly, rounding of float sum could otherwise order child before its parent
+    priorities = [[Fraction(key(item)) for item in column] for column in columns]
+    ranked = [sorted(range(len(column)), key=lambda i, column=column: (column[i], i)) for column in priorities]
+
+    state = (0,) * len(columns)
+    indexes = tuple(order[0] for order in ranked)
+    heap = [(sum(column[index] for column, index in zip(priorities, indexes)), indexes, state)]
+    while heap:
+        priority, indexes, state = heapq.heappop(heap)
+        yield tuple(column[index] for column, index in zip(columns, indexes))
+        # Every state is expanded only from the state with its last advanced column moved one step back
+        last = max((i for i, position in enumerate(state) if position), default=0)
+        for i in range(last, len(columns)):
+            if state[i] + 1 < len(columns[i]):
+                index = ranked[i][state[i] + 1]
+                heapq.heappush(
+                    heap,
+                    (
+                        priority - priorities[i][indexes[i]] + priorities[i][index],
+                        indexes[:i] + (index,) + indexes[i + 1 :],
+                        state[:i] + (state[i] + 1,) + state[i + 1 :],
+                    ),
+                )
+
+
+def best_first_search(columns, key, fits, expansions):
+    """
+    Yield combinations of cartesian product of columns which fit. Partial combinations are expanded column
+    by column, so partial combinations which can't be completed are never expanded and search doesn't pass by
+    combinations which don't fit, unlike filtering of best_first_product. The first expanded partial combinations
+    are the ones with the lowest summed priority of their items and of the lowest items of remaining columns,
+    so combinations are yielded in increasing order of priority, then the deepest ones are expanded first,
+    so search ends quickly even when it would pass by many partial combinations of close priority.
+    :param columns: Lists of items, one item of each list is used in combination
+    :param key: Function returning priority of single item
+    :param fits: Function returning True if partial combination, list with None for items of remaining columns,
+    can be completed with items of columns when given item is added to it
+    :param expansions: Number of partial combinations expanded in order of priority
+    :return: Generator of tuples with one item of each column
+    """
+    if not all(columns):
+        return
+    priorities = [[key(item) for item in column] for column in columns]
+    lowest = [min(column) for column in priorities]
+    heap = [((sum(lowest), 0), sum(lowest), ())]
+    while heap:
+        if not expansions:
+            heap = [((-len(indexes), priority), priority, indexes) for _, priority, indexes in heap]
+            heapq.heapify(heap)
+        expansions -= 1
+        _, priority, indexes = heapq.heappop(heap)
+        depth = len(indexes)
+        if depth == len(columns):
+            yield tuple(column[index] for column, index in zip(columns, indexes))
+            continue
+        partial = [column[index] for column, index in zip(columns, indexes)] + [None] * (len(columns) - depth)
+        for index, item in enumerate(columns[depth]):
+            partial[depth] = item
+            if fits(partial, item):
+                child = priority - lowest[depth] + priorities[depth][index]
+                # Deeper partial combinations of the same priority go first, so ties are completed right away
+                rank = (child, -depth - 1) if expansions > 0 else (-depth - 1, child)
+                heapq.heappush(heap, (rank, child, indexes + (index,)))
+        partial[depth] = None
@@ -0,0 +1,159 @@
+"""Columnar binary format of generated configurations for pairwise tool"""
+import json
+import mmap
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+
+MAGIC = b"PAIRWISE"
+VERSION = 1
+# Magic, version, typecode of value ids, length of JSON dictionary and number of configurations
+HEADER = struct.Struct("<8sHcxIQ")
+# Columns start at offset aligned to this number of bytes
+ALIGNMENT = 8
+
+
+class BinarySuiteWriter:
+    """
+    Writer of configurations in columnar binary format. File starts with fixed header followed by JSON
+    dictionary of kinds and their values, then every kind has column of value ids (positions of values
+    within kind) in little-endian unsigned integers of the smallest type fitting all kinds. Columns
+    are kept in compact arrays and written once writer is closed.
+    """
+
+    def __init__(self, parameters, output):
+        """
+        :param parameters: Values of each kind, e.g. "Parameters" section of input file
+        :param output: Binary output file
+        """
+        self.kinds = list(parameters)
+        self.values = [list(values) for values in parameters.values()]
+        self.output = output
+        size = max((len(values) for values in self.values), default=0)
+        self.typecode = next(code for code in "BHI" if size <= 1 << 8 * array(code).itemsize)
+        self.columns = [array(self.typecode) for _ in self.kinds]
+        self._lookup = [{(type(value), value): index for index, value in enumerate(values)} for values in self.values]
+
+    def writerows(self, rows):
+        """
+        :param rows: Configurations as lists of values in kind order
+        """
+        for row in rows:
+            for column, lookup, value in zip(self.columns, self._lookup, row):
+                column.append(lookup[(type(value), value)])
+
+    def close(self):
+        """Write header, dictionary and columns of all written configurations"""
+        dictionary = json.dumps({"kinds": self.kinds, "values": self.values}, separators=(",", ":")).encode()
+        rows = len(self.columns[0]) if self.columns else 0
+        self.output.write(HEADER.pack(MAGIC, VERSION, self.typecode.encode(), len(dictionary), rows))
+        self.output.write(dictionary + bytes(-(HEADER.size + len(dictionary)) % ALIGNMENT))
+        for column in self.columns:
+            if sys.byteorder == "big":
+                column.byteswap()
+            self.output.write(column.tobytes())
+        self.output.flush()
+
+
+class BinarySuite(Sequence):
+    """
+    Memory-mapped reader of configurations in columnar binary format. Columns and their ranges are views
+    of mapped file, so opening even large suite reads only header and dictionary.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: Path of binary suite file
+        """
+        with open(path, "rb") as file:
+            try:
+                self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:
+                raise InvalidSuite(f"\nFile {path} is empty.") from e
+        try:
+            magic, version, typecode, length, self.rows = HEADER.unpack_from(self._mmap)
+            if magic != MAGIC:
+                raise InvalidSuite(f"\nFile {path} is not pairwise binary suite.")
+            if version != VERSION:
+                raise InvalidSuite(f"\nVersion {version} of binary suite {path} is not supported.")
+            dictionary = json.loads(self._mmap[HEADER.size : HEADER.size + length])
+            self.kinds = dictionary["kinds"]
+            self.values = dictionary["values"]
+            self.typecode = typecode.decode()
+            start = HEADER.size + length + -(HEADER.size + length) % ALIGNMENT
+            end = start + self.rows * len(self.kinds) * array(self.typecode).itemsize
+            if len(self._mmap) < end:
+                raise InvalidSuite(f"\nBinary suite {path} is truncated.")
+            self._ids = memoryview(self._mmap)[start:end].cast(self.typecode)
+            if sys.byteorder == "big":
+                # Ids are little-endian, so big-endian hosts read swapped copy instead of mapped file
+                ids = array(self.typecode, self._ids)
+                ids.byteswap()
+                self._ids.release()
+                self._ids = memoryview(ids)
+        except (struct.error, ValueError, KeyError) as e:
+            self._mmap.close()
+            raise InvalidSuite(f"\nFile {path} is not valid pairwise binary suite.") from e
+        except InvalidSuite:
+            self._mmap.close()
+            raise
+        self._kind_index = {kind: index for index, kind in enumerate(self.kinds)}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Unmap file, views returned by column have to be released before"""
+        self._ids.release()
+        self._mmap.close()
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, index):
+        """
+        :param index: Index or slice of configurations
+        :return: Configuration as dictionary of kinds and values, list of them for slice
+        """
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.rows))]
+        return {kind: values[value_id] for kind, values, value_id in zip(self.kinds, self.values, self.row(index))}
+
+    def column(self, kind, start=0, stop=None):
+        """
+        :param kind: Name or index of kind
+        :param start: First configuration
+        :param stop: Configuration after the last one, number of configurations when not given
+        :return: Value ids of kind in given range of configurations as view of mapped file
+        """
+        kind_index = self._kind_index[kind] if isinstance(kind, str) else kind
+        start, stop, _ = slice(start, stop).indices(self.rows)
+        return self._ids[kind_index * self.rows + start : kind_index * self.rows + max(start, stop)]
+
+    def row(self, index):
+        """
+        :param index: Index of configuration
+        :return: Value ids of configuration in kind order
+        """
+        if index < 0:
+            index += self.rows
+        if not 0 <= index < self.rows:
+            raise IndexError("configuration index out of range")
+        return tuple(self._ids[kind * self.rows + index] for kind in range(len(self.kinds)))
+
+    def decode(self, kind, ids):
+        """
+        :param kind: Name or index of kind
+        :param ids: Value ids of kind, e.g. returned by column
+        :return: Values of given ids
+        """
+        values = self.values[self._kind_index[kind] if isinstance(kind, str) else kind]
+        return [values[value_id] for value_id in ids]
+
+
+class InvalidSuite(Exception):
+    """Exception class for invalid binary suite file"""
@@ -0,0 +1,64 @@
+"""Budget of generation for pairwise tool"""
+import time
+
+# Minimal number of seconds between two progress reports
+PROGRESS_INTERVAL = 1.0
+
+
+class Budget:
+    """
+    Limits of generation, generator stops adding configurations meeting weights once time or number
+    of configurations runs out, pairs are covered regardless of it. Progress is reported at most once per interval,
+    so checking budget after every configuration costs only reading the clock.
+    """
+
+    def __init__(self, seconds=None, configurations=None, progress=None, interval=PROGRESS_INTERVAL):
+        """
+        :param seconds: Number of seconds generation may take, it is not limited when not given
+        :param configurations: Maximal number of configurations, it is not limited when not given
+        :param progress: Function called with line of progress report, progress is not reported when not given
+        :param interval: Minimal number of seconds between two progress reports
+        """
+        start = time.monotonic()
+        self.deadline = start + seconds if seconds is not None else None
+        self.configurations = configurations
+        self.progress = progress
+        self.interval = interval
+        self.exhausted = False
+        self._last_report = start
+
+    @property
+    def limited(self):
+        """
+        :return: True if time or number of configurations is limited, False otherwise
+        """
+        return self.deadline is not None or self.configurations is not None
+
+    def spent(self, configurations):
+        """
+        :param configurations: Number of generated configurations
+        :return: True if time or number of configurations ran out, it stays True once it happens
+        """
+        if (self.configurations is not None and configurations >= self.configurations) or (
+            self.deadline is not None and time.monotonic() >= self.deadline
+        ):
+            self.exhausted = True
+        return self.exhausted
+
+    def report_due(self):
+        """
+        :return: True if progress is reported and interval elapsed since the last report, False otherwise
+        """
+        return self.progress is not None and time.monotonic() - self._last_report >= self.interval
+
+    def report(self, configurations, uncovered, divergence):
+        """
+        :param configurations: Number of generated configurations
+        :param uncovered: Number of uncovered pairs
+        :param divergence: The highest KL divergence of parameter
+        """
+        self._last_report = time.monotonic()
+        self.progress(
+            f"Progress: {configurations} configurations, {uncovered} uncovered pairs, "
+            f"maximal divergence {divergence:.4f}"
+        )
@@ -0,0 +1,76 @@
+"""Client of local generation service of pairwise tool"""
+import json
+import socket
+import warnings
+
+import click
+
+from .configuration_writer import ConfigurationWriter
+from .parameters_check import ParametersCheck
+from .server import default_socket
+
+
+@click.command()
+@click.argument("parameters", type=click.File("r"))
+@click.option("-o", "--output", help="CSV output file, - for stdout", type=click.File("w"))
+@click.option("-m", "--margin", help="Margin of weights, default is 0.05", type=click.FLOAT)
+@click.option(
+    "--engine",
+    help="Generation engine, default is python",
+    type=click.Choice(["python", "numpy"]),
+    default="python",
+)
+@click.option(
+    "--strength",
+    help="Number of parameters of different kinds whose combinations are all covered, default is 2",
+    type=click.IntRange(min=2),
+    default=2,
+)
+@click.option(
+    "--socket",
+    "socket_path",
+    help="Path of Unix socket of server, default is the same as of pairwise serve",
+    type=click.Path(dir_okay=False),
+    envvar="PAIRWISE_SOCKET",
+    default=default_socket,
+)
+@click.option("--port", help="TCP port of server on localhost instead of Unix socket", type=click.IntRange(0, 65535))
+# pylint: disable=too-many-arguments,too-many-positional-arguments
+def client(parameters, output, margin, engine, strength, socket_path, port):
+    """Generate configurations of PARAMETERS by running pairwise serve"""
+    check = ParametersCheck(parameters)
+    check.check_parameters()
+    kinds = list(check.file["Parameters"])
+    response = request(
+        {"parameters": check.file, "margin": margin, "engine": engine, "strength": strength}, socket_path, port
+    )
+    if "error" in response:
+        raise click.UsageError(response["error"])
+
+    to_stdout = output is not None and output.name == "<stdout>"
+    with ConfigurationWriter(kinds, output, print_rows=not to_stdout) as writer:
+        for row in response["configurations"]:
+            writer.write(dict(zip(kinds, row)))
+    for message in response["warnings"]:
+        warnings.warn(message)
+
+
+def request(payload, socket_path, port=None):
+    """
+    :param payload: Request with parameters and options
+    :param socket_path: Path of Unix socket of server
+    :param port: TCP port of server on localhost, Unix socket is used when not given
+    :return: Response of server
+    """
+    family, address = (socket.AF_UNIX, socket_path) if port is None else (socket.AF_INET, ("127.0.0.1", port))
+    try:
+        with socket.socket(family) as connection:
+            connection.connect(address)
+            connection.sendall(json.dumps(payload, separators=(",", ":")).encode() + b"\n")
+            with connection.makefile("rb") as response:
+                line = response.readline()
+    except OSError as e:
+        raise click.ClickException(f"Can't connect to pairwise server: {e}") from e
+    if not line:
+        raise click.ClickException("Pairwise server closed connection without response.")
+    return json.loads(line)
@@ -0,0 +1,28 @@
+"""Compiled parameters shared by generators of pairwise tool"""
+from .constraints import ConstraintIndex
+from .parameters_model import ParametersModel
+
+
+class CompiledParameters:  # pylint: disable=too-few-public-methods
+    """
+    Parameters model and constraint index of one input, combinations impossible because of constraints
+    are searched once for each strength. Generators don't change them, so process generating many suites
+    of the same parameters (e.g. with different margin or engine) compiles them only once.
+    """
+
+    def __init__(self, parameters):
+        """
+        :param parameters: Loaded input file with parameters, weights, costs and constraints
+        """
+        self.model = ParametersModel(parameters)
+        self.constraints = ConstraintIndex(self.model, parameters.get("Constraints", []))
+        self._impossible = {}
+
+    def impossible(self, strength):
+        """
+        :param strength: Number of parameters in covered combinations
+        :return: Combinations of parameters of different kinds which are in no configuration allowed by constraints
+        """
+        if strength not in self._impossible:
+            self._impossible[strength] = self.constraints.impossible(strength)
+        return self._impossible[strength]
@@ -0,0 +1,90 @@
+"""Configuration store for pairwise tool"""
+from array import array
+from collections.abc import Sequence
+
+
+class ConfigurationStore(Sequence):
+    """
+    Generated configurations stored row after row as parameter ids in one contiguous array. Ids are stored
+    in the smallest unsigned type which fits all parameters, so configuration takes one or two bytes per kind
+    instead of tuple of integer objects.
+    """
+
+    def __init__(self, width, size):
+        """
+        :param width: Number of parameter kinds, i.e. length of configuration
+        :param size: Number of parameters
+        """
+        self.width = width
+        self.typecode = next(code for code in "BHIQ" if size <= 1 << 8 * array(code).itemsize)
+        self._data = array(self.typecode)
+        # Rows as bytes of their ids, so uniqueness check does not keep tuples of all rows
+        self._keys = set()
+
+    def __len__(self):
+        return len(self._data) // self.width if self.width else 0
+
+    def __getitem__(self, index):
+        """
+        :param index: Index or slice of configurations
+        :return: Configuration as tuple of parameter ids, list of them for slice
+        """
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("configuration index out of range")
+        return tuple(self._data[index * self.width : (index + 1) * self.width])
+
+    def __iter__(self):
+        for start in range(0, len(self._data), self.width):
+            yield tuple(self._data[start : start + self.width])
+
+    def __contains__(self, row):
+        """
+        :param row: Configuration as tuple of parameter ids
+        :return: True if configuration is stored, False otherwise
+        """
+        return self._key(row) in self._keys
+
+    def _key(self, row):
+        """
+        :param row: Configuration as tuple of parameter ids
+        :return: Bytes of configuration in the same type as stored rows
+        """
+        return array(self.typecode, row).tobytes()
+
+    def append(self, row):
+        """
+        :param row: Configuration as tuple of parameter ids
+        """
+        self._data.extend(row)
+        self._keys.add(self._key(row))
+
+
+class ConfigurationView(Sequence):
+    """Read-only view of stored configurations as dictionaries of kinds and values, rows are decoded on access"""
+
+    def __init__(self, store, model):
+        """
+        :param store: Configuration store
+        :param model: Compiled parameters model
+        """
+        self.store = store
+        self.model = model
+
+    def __len__(self):
+        return len(self.store)
+
+    def __getitem__(self, index):
+        """
+        :param index: Index or slice of configurations
+        :return: Configuration as dictionary of kinds and values, list of them for slice
+        """
+        if isinstance(index, slice):
+            return [self.model.decode(row) for row in self.store[index]]
+        return self.model.decode(self.store[index])
+
+    def __iter__(self):
+        return (self.model.decode(row) for row in self.store)
@@ -0,0 +1,89 @@
+"""Configuration writer for pairwise tool"""
+import csv
+import sys
+import threading
+
+from .binary_suite import BinarySuiteWriter
+
+
+# pylint: disable=too-many-instance-attributes
+class ConfigurationWriter:
+    """
+    Writer streaming generated configurations to stdout and CSV output. Rows are buffered and written
+    in bulk, buffer is flushed once it is full or by timer once flush interval elapsed since the first buffered
+    configuration, so consumers receive configurations while generation is still computing the next ones.
+    """
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def __init__(
+        self, kinds, output=None, print_rows=True, batch_size=64, flush_interval=0.2, parameters=None, cost=None
+    ):
+        """
+        :param kinds: Names of parameter kinds used as CSV header
+        :param output: CSV output file, binary output file when parameters are given
+        :param print_rows: Print numbered configurations to stdout
+        :param batch_size: Maximal number of buffered configurations
+        :param flush_interval: Maximal number of seconds configuration is buffered for
+        :param parameters: Values of each kind, output is written in columnar binary format when given
+        :param cost: Function returning cost of configuration, costs of written configurations are summed
+        in total_cost, which is None when not given
+        """
+        self.output = output
+        self.print_rows = print_rows
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.count = 0
+        self.cost = cost
+        self.total_cost = 0 if cost else None
+        self._rows = []
+        # Timer flushes buffer from its own thread, so buffer and outputs are changed only under lock
+        self._lock = threading.Lock()
+        self._timer = None
+        self._table = None
+        if output and parameters:
+            self._table = BinarySuiteWriter(parameters, output)
+        elif output:
+            self._table = csv.writer(output)
+            self._table.writerow(kinds)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.flush()
+        if isinstance(self._table, BinarySuiteWriter):
+            self._table.close()
+
+    def write(self, configuration):
+        """
+        :param configuration: Configuration as dictionary of kinds and values
+        """
+        with self._lock:
+            self._rows.append(list(configuration.values()))
+            if self.cost:
+                self.total_cost += self.cost(configuration)
+            full = len(self._rows) >= self.batch_size
+            if not full and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Write buffered configurations"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._rows:
+                return
+            if self.print_rows:
+                lines = [f"{self.count + i + 1}: {row}\n" for i, row in enumerate(self._rows)]
+                sys.stdout.write("".join(lines))
+                sys.stdout.flush()
+            if self._table:
+                self._table.writerows(self._rows)
+                self.output.flush()
+            self.count += len(self._rows)
+            self._rows = []
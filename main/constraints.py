@@ -0,0 +1,283 @@
+"""Constraint index for pairwise tool"""
+import itertools
+
+from .best_first import best_first_product, best_first_search
+
+# Number of partial configurations expanded in order of priority when configurations allowed by constraints
+# are searched, the deepest ones are expanded first afterwards
+SEARCH_EXPANSIONS = 4096
+
+
+class ConstraintIndex:
+    """
+    Constraints compiled into forbidden combinations of parameter ids. Every parameter keeps set of parameters
+    it must not be combined with and list of longer forbidden combinations containing it, so checking
+    whether parameter fits into configuration needs only set lookups.
+    """
+
+    def __init__(self, model, constraints):
+        """
+        :param model: Compiled parameters model
+        :param constraints: Constraints from input file, each one is either forbidden combination
+        of values of kinds, or "if" combination of values of kinds "then" allowed values of other kinds
+        """
+        self.model = model
+        self.forbidden_params = set()
+        self.forbidden_partners = [set() for _ in range(len(model))]
+        self.forbidden_combinations = [[] for _ in range(len(model))]
+        lookup = [
+            {(type(model.values[param]), model.values[param]): param for param in params}
+            for params in model.kind_params
+        ]
+        for constraint in constraints:
+            for forbidden in self._forbidden(constraint):
+                columns = [
+                    [lookup[kind][(type(value), value)] for value in (values if isinstance(values, list) else [values])]
+                    for kind, values in forbidden
+                ]
+                for combination in itertools.product(*columns):
+                    self._add(combination)
+        self.constrained = {
+            param
+            for param in range(len(model))
+            if param in self.forbidden_params or self.forbidden_partners[param] or self.forbidden_combinations[param]
+        }
+        # Kinds of parameters each parameter is constrained with
+        self.constrained_kinds = [
+            {model.kind_of[other] for other in self.forbidden_partners[param]}
+            | {model.kind_of[other] for combination in self.forbidden_combinations[param] for other in combination}
+            for param in range(len(model))
+        ]
+
+    def __bool__(self):
+        return bool(self.constrained)
+
+    def _forbidden(self, constraint):
+        """
+        :param constraint: Constraint from input file
+        :return: Forbidden combinations as lists of kind indexes and their values
+        """
+        kinds = {kind: index for index, kind in enumerate(self.model.kinds)}
+        if set(constraint) != {"if", "then"}:
+            return [[(kinds[kind], values) for kind, values in constraint.items()]]
+        condition = [(kinds[kind], values) for kind, values in constraint["if"].items()]
+        forbidden = []
+        for kind, allowed in constraint["then"].items():
+            allowed = allowed if isinstance(allowed, list) else [allowed]
+            allowed = {(type(value), value) for value in allowed}
+            values = [
+                self.model.values[param]
+                for param in self.model.kind_params[kinds[kind]]
+                if (type(self.model.values[param]), self.model.values[param]) not in allowed
+            ]
+            if values:
+                forbidden.append(condition + [(kinds[kind], values)])
+        return forbidden
+
+    def _add(self, combination):
+        """
+        :param combination: Forbidden combination of parameter ids
+        """
+        if len(set(self.model.kind_of[param] for param in combination)) != len(combination):
+            # Parameters of one kind are never combined
+            return
+        if len(combination) == 1:
+            self.forbidden_params.add(combination[0])
+        elif len(combination) == 2:
+            self.forbidden_partners[combination[0]].add(combination[1])
+            self.forbidden_partners[combination[1]].add(combination[0])
+        else:
+            for param in combination:
+                self.forbidden_combinations[param].append(combination)
+
+    def compatible(self, param, configuration):
+        """
+        :param param:
+        :param configuration: Partially filled configuration, None for unfilled positions
+        :return: True if parameter can be added to configuration without breaking constraints, False otherwise
+        """
+        if param not in self.constrained:
+            return True
+        if param in self.forbidden_params:
+            return False
+        if not self.forbidden_partners[param].isdisjoint(configuration):
+            return False
+        kind_of = self.model.kind_of
+        for combination in self.forbidden_combinations[param]:
+            if all(configuration[kind_of[other]] == other for other in combination if other != param):
+                return False
+        return True
+
+    def allows(self, configuration):
+        """
+        :param configuration: Partially filled configuration, None for unfilled positions
+        :return: True if configuration does not break any constraint, False otherwise
+        """
+        if not self.constrained:
+            return True
+        return all(param is None or self.compatible(param, configuration) for param in configuration)
+
+    def forbids(self, combination):
+        """
+        :param combination: Parameters of different kinds
+        :return: True if combination itself breaks constraints, False otherwise
+        """
+        configuration = [None] * len(self.model.kinds)
+        for param in combination:
+            configuration[self.model.kind_of[param]] = param
+        return not self.allows(configuration)
+
+    def product(self, columns, key):
+        """
+        :param columns: Parameters of each kind
+        :param key: Function returning priority of parameter
+        :return: Generator of configurations allowed by constraints made of parameters of columns, in increasing
+        order of summed priority of their parameters while search is within its expansions
+        """
+        if not self.constrained:
+            return best_first_product(columns, key)
+        # Completion of every partial configuration which fits is kept, its child fits whenever added parameter
+        # can replace parameter of completion, so completion is searched only when it can't
+        completions = {(): self._fill([None] * len(columns), columns)}
+
+        def fits(partial, param):
+            prefix = tuple(partial[: self.model.kind_of[param]])
+            row = completions[prefix] and self._substitute(completions[prefix], partial, param, columns)
+            if row is None:
+                return False
+            completions[prefix + (param,)] = row
+            return True
+
+        return best_first_search(columns, key, fits, SEARCH_EXPANSIONS)
+
+    def extends(self, configuration, param, kind_params=None):
+        """
+        :param configuration: Partially filled configuration which can be completed without breaking constraints,
+        parameter is already added to it
+        :param param: Added parameter
+        :param kind_params: Parameters of each kind configuration may be completed with, all parameters
+        when not given
+        :return: True if configuration can still be completed without breaking constraints, False otherwise
+        """
+        if param not in self.constrained:
+            return True
+        if not self.compatible(param, configuration):
+            return False
+        # Completion of configuration fits added parameter when all parameters it is constrained with are chosen
+        if all(configuration[kind] is not None for kind in self.constrained_kinds[param]):
+            return True
+        return self._fill(configuration, kind_params or self.model.kind_params) is not None
+
+    def complete(self, configuration):
+        """
+        :param configuration: Partially filled configuration, None for unfilled positions
+        :return: Configuration completed without breaking constraints, None if there is none
+        """
+        if not self.allows(configuration):
+            return None
+        return self._fill(configuration, self.model.kind_params)
+
+    def _substitute(self, completion, configuration, param, kind_params):
+        """
+        :param completion: Completion of configuration before parameter was added to it
+        :param configuration: Partially filled configuration, parameter is already added to it
+        :param param: Added parameter
+        :param kind_params: Parameters of each kind configuration may be completed with
+        :return: Completion of configuration with added parameter, None if there is none
+        """
+        row = list(completion)
+        row[self.model.kind_of[param]] = param
+        if self.compatible(param, row):
+            return tuple(row)
+        if not self.compatible(param, configuration):
+            return None
+        # Kinds constrained with parameter are filled again first, the whole completion is searched when they can't
+        for kind in self.constrained_kinds[param]:
+            if configuration[kind] is None:
+                if not any(self.compatible(other, configuration) for other in kind_params[kind]):
+                    return None
+                row[kind] = None
+        options = {
+            kind: [other for other in kind_params[kind] if self.compatible(other, row)]
+            for kind, value in enumerate(row)
+            if value is None
+        }
+        if all(options.values()) and (repaired := self._search(row, options)):
+            return repaired
+        return self._fill(configuration, kind_params)
+
+    def _fill(self, configuration, kind_params):
+        """
+        :param configuration: Partially filled configuration which does not break constraints
+        :param kind_params: Parameters of each kind configuration may be completed with
+        :return: Completed configuration, None if there is none
+        """
+        # Unconstrained parameter fits into any configuration, so only kinds without one are searched
+        free = [
+            next((param for param in params if param not in self.constrained), None) if value is None else value
+            for value, params in zip(configuration, kind_params)
+        ]
+        options = {
+            kind: [param for param in kind_params[kind] if self.compatible(param, free)]
+            for kind, param in enumerate(free)
+            if param is None
+        }
+        return self._search(free, options)
+
+    def _search(self, configuration, options):
+        """
+        Backtracking search filling kind with fewest compatible parameters first, only options of kinds
+        constrained with chosen parameter are narrowed after each choice
+        :param configuration: Partially filled configuration which does not break constraints
+        :param options: Parameters of each unfilled kind compatible with configuration
+        :return: Completed configuration, None if there is none
+        """
+        if not options:
+            return tuple(configuration)
+        kind = min(options, key=lambda kind: len(options[kind]))
+        for param in options[kind]:
+            configuration[kind] = param
+            touched = self.constrained_kinds[param]
+            rest = {
+                other: [option for option in params if self.compatible(option, configuration)]
+                if other in touched
+                else params
+                for other, params in options.items()
+                if other != kind
+            }
+            if all(rest.values()) and (row := self._search(configuration, rest)):
+                return row
+        configuration[kind] = None
+        return None
+
+    def impossible(self, strength):
+        """
+        :param strength: Number of parameters in covered combinations
+        :return: Combinations of parameters of different kinds which are in no configuration allowed by constraints
+        """
+        if not self.constrained:
+            return []
+        kind_params = self.model.kind_params
+        if self.complete([None] * len(kind_params)) is None:
+            return [
+                combination
+                for kinds in itertools.combinations(range(len(kind_params)), strength)
+                for combination in itertools.product(*(kind_params[kind] for kind in kinds))
+            ]
+        # Combination without constrained parameters fits into any allowed configuration,
+        # combinations found in allowed configuration need no further search
+        impossible = []
+        witnessed = set()
+        for kinds in itertools.combinations(range(len(kind_params)), strength):
+            for combination in itertools.product(*(kind_params[kind] for kind in kinds)):
+                if combination in witnessed or self.constrained.isdisjoint(combination):
+                    continue
+                configuration = [None] * len(kind_params)
+                for kind, param in zip(kinds, combination):
+                    configuration[kind] = param
+                row = self.complete(configuration)
+                if row is None:
+                    impossible.append(combination)
+                else:
+                    witnessed.update(itertools.combinations(row, strength))
+        return impossible
@@ -0,0 +1,41 @@
+"""KL divergences of parameters for pairwise tool"""
+from collections.abc import Mapping
+
+
+class Divergences(Mapping):
+    """
+    KL divergence of each parameter in current configurations of generator. Divergence of parameter is computed
+    from its count only when it is read, so appended configuration updates nothing but counts of its parameters,
+    and each divergence is computed at most once per number of configurations. Parameters are iterated in order
+    of their first usage, unused parameters are last.
+    """
+
+    def __init__(self, pairwise):
+        """
+        :param pairwise: Generator whose configurations and counts of parameters are used
+        """
+        self.pairwise = pairwise
+        self._total = None
+        self._values = {}
+
+    def __getitem__(self, param):
+        if not 0 <= param < len(self.pairwise.model):
+            raise KeyError(param)
+        total = len(self.pairwise.rows)
+        if total != self._total:
+            self._total = total
+            self._values = {}
+        if param not in self._values:
+            ratio = self.pairwise.quantity[param] / total if total else 0
+            self._values[param] = self.pairwise._divergence(param, ratio)  # pylint: disable=protected-access
+        return self._values[param]
+
+    def __iter__(self):
+        used = self.pairwise._used_params  # pylint: disable=protected-access
+        yield from used
+        if len(used) != len(self.pairwise.model):
+            seen = set(used)
+            yield from (param for param in range(len(self.pairwise.model)) if param not in seen)
+
+    def __len__(self):
+        return len(self.pairwise.model)
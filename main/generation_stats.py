@@ -0,0 +1,156 @@
+"""Generation statistics for pairwise tool"""
+import time
+from collections import Counter
+
+# Instrumented methods of Pairwise, their phase and strategy credited with successful call
+PHASES = [
+    ("_generate_configuration", "generate", None),
+    ("_main_param", "main parameter", None),
+    ("_add_triplet", "triplet", "triplet"),
+    ("_find_triplet", "find triplet", None),
+    ("_add_transitive_triplet", "transitive triplet", "transitive"),
+    ("_param_in_pair", "pair", "pair"),
+    ("_param_not_in_pair", "fill", "fill"),
+    ("_update_pairs", "update pairs", None),
+    ("_alter_configuration", "alter", "alter"),
+    ("_create_configuration", "create", "create"),
+    ("_append_configuration", "append", None),
+    ("_check_ratio", "ratio check", None),
+    ("_quotas", "quotas", None),
+    ("_quota_configuration", "balance", None),
+    ("_kl_divergence", "kl divergence", None),
+]
+
+
+class GenerationStats:
+    """
+    Instrumentation of pairwise generator. Methods of generator instance are wrapped once stats are attached,
+    so generator which is not instrumented runs without any overhead. Times of phases are cumulative,
+    time of phase includes times of phases called from it.
+    """
+
+    def __init__(self, callback=None):
+        """
+        :param callback: Function called with record of each added configuration
+        """
+        self.callback = callback
+        self.phases = {phase: [0, 0.0] for _, phase, _ in PHASES}
+        self.strategies = Counter()
+        self.branches = Counter()
+        self.records = []
+        self._steps = []
+        self._start = time.perf_counter()
+
+    def attach(self, pairwise):
+        """
+        Instrument generator
+        :param pairwise: Pairwise generator
+        :return: Instrumented generator
+        """
+        kl_divergence = pairwise._kl_divergence  # pylint: disable=protected-access
+        for method, phase, strategy in PHASES:
+            # Appending is replaced below by wrapper recording each generated configuration
+            if method != "_append_configuration" and hasattr(pairwise, method):
+                setattr(pairwise, method, self._wrap(getattr(pairwise, method), phase, strategy))
+        store = self._wrap(pairwise._store_configuration, "append", None)  # pylint: disable=protected-access
+
+        def append_configuration(configuration):
+            branch = self._branch(pairwise)
+            store(configuration)
+            self._record(pairwise, branch, kl_divergence())
+
+        pairwise._append_configuration = append_configuration  # pylint: disable=protected-access
+        self._start = time.perf_counter()
+        return pairwise
+
+    def _wrap(self, function, phase, strategy):
+        """
+        :return: Function measuring calls and time of given phase and crediting strategy with successful calls
+        """
+        phase_stats = self.phases[phase]
+
+        def wrapper(*args):
+            start = time.perf_counter()
+            result = function(*args)
+            phase_stats[0] += 1
+            phase_stats[1] += time.perf_counter() - start
+            if strategy and result is not None and result is not False:
+                self.strategies[strategy] += 1
+                self._steps.append(strategy)
+            return result
+
+        return wrapper
+
+    def _branch(self, pairwise):
+        """
+        :param pairwise: Pairwise generator
+        :return: Strategy which produced configuration, configuration replaced by altered or created one
+        is credited to alter or create strategy, otherwise to the first strategy in order of PHASES which
+        added parameters to it, configurations added to meet weights once all pairs are covered are credited
+        to balance strategy, other configurations built without instrumented strategy are direct
+        """
+        if self._steps and self._steps[-1] in ("alter", "create"):
+            return self._steps[-1]
+        for _, _, strategy in PHASES:
+            if strategy in self._steps:
+                return strategy
+        return "direct" if pairwise.pairs else "balance"
+
+    def _record(self, pairwise, branch, kld):
+        """
+        Record added configuration
+        :param pairwise: Pairwise generator
+        :param branch: Strategy which completed configuration
+        :param kld: KL divergence of each parameter
+        """
+        self.branches[branch] += 1
+        record = {
+            "configuration": len(pairwise.rows),
+            "seconds": time.perf_counter() - self._start,
+            "branch": branch,
+            "steps": dict(Counter(self._steps)),
+            "uncovered_pairs": len(pairwise.pairs),
+            "kl_divergence": max((abs(value) for value in kld.values()), default=0),
+        }
+        self.records.append(record)
+        self._steps = []
+        if self.callback:
+            self.callback(record)
+
+    @property
+    def seconds(self):
+        """
+        :return: Seconds from attaching statistics to the last added configuration
+        """
+        return self.records[-1]["seconds"] if self.records else 0.0
+
+    def to_dict(self):
+        """
+        :return: Statistics as dictionary which can be serialized to JSON
+        """
+        return {
+            "seconds": self.seconds,
+            "configurations": len(self.records),
+            "phases": {phase: {"calls": calls, "seconds": seconds} for phase, (calls, seconds) in self.phases.items()},
+            "strategies": dict(self.strategies),
+            "branches": dict(self.branches),
+            "records": self.records,
+        }
+
+    def summary(self):
+        """
+        :return: Human readable summary of statistics
+        """
+        uncovered = self.records[-1]["uncovered_pairs"] if self.records else None
+        lines = [
+            f"Generated {len(self.records)} configurations in {self.seconds:.3f} s, "
+            f"{uncovered} uncovered pairs remaining",
+            f"{'Phase':<20}{'Calls':>10}{'Seconds':>12}",
+        ]
+        for phase, (calls, seconds) in self.phases.items():
+            if calls:
+                lines.append(f"{phase:<20}{calls:>10}{seconds:>12.3f}")
+        lines.append(f"{'Strategy':<20}{'Steps':>10}{'Rows':>12}")
+        for strategy in sorted(set(self.strategies) | set(self.branches)):
+            lines.append(f"{strategy:<20}{self.strategies[strategy]:>10}{self.branches[strategy]:>12}")
+        return "\n".join(lines)
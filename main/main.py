@@ -1,15 +1,73 @@
 """Pairwise tool for generating configurations"""
+import csv
+import itertools
+import json
+import sys
 import warnings
 
 import click
 
-from pairwise import Pairwise
-from parameters_check import ParametersCheck
+from .api import (
+    InvalidOption,
+    get_engine,
+    implied_impossible,
+    uncovered_combinations,
+    unmet_weights,
+    warn_completed,
+    warn_impossible,
+    warn_uncovered,
+    warn_unmet,
+)
+from .batch import batch
+from .budget import Budget
+from .client import client
+from .configuration_writer import ConfigurationWriter
+from .generation_stats import GenerationStats
+from .multistart import generate_best
+from .pairwise import DEFAULT_MARGIN
+from .parameters_check import ParametersCheck
+from .parameters_model import ParametersModel
+from .result_cache import ResultCache, default_cache_dir
+from .server import serve
+from .sharding import Sharding
+from .verify import verify
+
+
+class DefaultGroup(click.Group):
+    """
+    Group of commands which runs generate command when the first argument is not name of command,
+    so `pairwise parameters.json` is the same as `pairwise generate parameters.json`
+    """
+
+    def parse_args(self, ctx, args):
+        """
+        :param ctx: Context of group
+        :param args: Command line arguments
+        :return: Arguments left for subcommand
+        """
+        if not args or (args[0] not in self.commands and args[0] not in ctx.help_option_names):
+            args = ["generate", *args]
+        return super().parse_args(ctx, args)
 
 
-@click.command()
+@click.group(cls=DefaultGroup)
+def main():
+    """
+    Pairwise tool for generating configurations, parameter file named as command is generated
+    with generate command, e.g. pairwise generate batch
+    """
+
+
+@main.command("generate")
 @click.argument("parameters", type=click.File("r"))
-@click.option("-o", "--output", help="CSV output file", type=click.File("w"))
+@click.option("-o", "--output", help="CSV output file, - for stdout", type=click.File("w"))
+@click.option(
+    "--format",
+    "output_format",
+    help="Format of output file, binary is columnar file of value ids readable by BinarySuite, default is csv",
+    type=click.Choice(["csv", "binary"]),
+    default="csv",
+)
 @click.option(
     "-m",
     "--margin",
@@ -17,20 +75,312 @@ from parameters_check import ParametersCheck
     type=click.FLOAT,
 )
 @click.option("--count", help="Print how many times was each parameter used", is_flag=True)
-def main(parameters, output, count, margin):
-    """Main function for pairwise tool"""
+@click.option(
+    "--engine",
+    help="Generation engine, numpy engine scores batches of configurations at once, default is python",
+    type=click.Choice(["python", "numpy"]),
+    default="python",
+)
+@click.option(
+    "--strength",
+    help="Number of parameters of different kinds whose combinations are all covered, default is 2",
+    type=click.IntRange(min=2),
+    default=2,
+)
+@click.option(
+    "--restarts",
+    help="Number of generator runs with randomised tie-breaks, the smallest suite is kept, default is 1",
+    type=click.IntRange(min=1),
+    default=1,
+)
+@click.option(
+    "--jobs",
+    help="Number of processes running restarts in parallel, default is 1",
+    type=click.IntRange(min=1),
+    default=1,
+)
+@click.option("--seed", help="Seed of randomised restarts", type=click.INT)
+@click.option(
+    "--time-budget",
+    help="Seconds generation may take, configurations closest to ratio requirements so far are kept once it runs out",
+    type=click.FloatRange(min=0),
+)
+@click.option(
+    "--max-configurations",
+    help="Maximal number of generated configurations, configurations covering pairs are generated regardless of it",
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--minimise",
+    help="Remove redundant configurations and merge configurations which fit into one after generation",
+    is_flag=True,
+)
+@click.option(
+    "--shard",
+    help="Write only configurations of shard I out of N shards of balanced size, e.g. 1/4",
+    metavar="I/N",
+    callback=lambda _context, _parameter, shard: parse_shard(shard),
+)
+@click.option(
+    "--seed-suite",
+    help="CSV file with existing configurations which are extended instead of generating all configurations",
+    type=click.File("r"),
+)
+@click.option("--profile", help="Print time and calls of generation phases and strategies to stderr", is_flag=True)
+@click.option("--stats-json", help="JSON output file with generation statistics", type=click.File("w"))
+@click.option("--no-cache", help="Do not load nor store generated configurations in cache", is_flag=True)
+@click.option(
+    "--cache-dir",
+    help="Directory of cached configurations, default is ~/.cache/pairwise",
+    type=click.Path(file_okay=False),
+    envvar="PAIRWISE_CACHE_DIR",
+    default=default_cache_dir,
+)
+@click.option(
+    "--cache-size",
+    help="Maximal size of cache in MB, least recently used results are removed, default is 64",
+    type=click.FloatRange(min=0),
+    default=64,
+    callback=lambda _context, _parameter, size: int(size * 2**20),
+)
+@click.option("--cache-info", help="Print whether configurations were loaded from cache to stderr", is_flag=True)
+# pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+def generate_configurations(
+    parameters,
+    output,
+    output_format,
+    count,
+    margin,
+    engine,
+    strength,
+    restarts,
+    jobs,
+    seed,
+    time_budget,
+    max_configurations,
+    minimise,
+    shard,
+    seed_suite,
+    profile,
+    stats_json,
+    no_cache,
+    cache_dir,
+    cache_size,
+    cache_info,
+):
+    """Generate configurations covering all pairs of parameters in PARAMETERS file"""
+    if output_format == "binary" and output is None:
+        raise click.UsageError("Option --format binary requires --output.")
+    stats = GenerationStats() if profile or stats_json else None
+    budget = Budget(time_budget, max_configurations, progress=lambda line: click.echo(line, err=True))
+    check_restarts(restarts, stats, budget)
     check = ParametersCheck(parameters)
     check.check_parameters()
-    pairwise = Pairwise(check.file, margin)
-    generated_all = pairwise.generate_configurations()
-    pairwise.print_configurations()
-    if not generated_all:
-        warnings.warn("No more unique configuration meeting the requirements")
-    if output:
-        pairwise.to_csv(output)
+    kinds = list(check.file["Parameters"])
+    try:
+        engine_class = get_engine(engine, strength, len(kinds))
+    except InvalidOption as e:
+        raise click.UsageError(str(e)) from e
+    seed_configurations = list(csv.DictReader(seed_suite)) if seed_suite else []
+
+    # Profiled run has to generate configurations, randomised restarts without seed are not reproducible
+    cache = (
+        None
+        if no_cache or stats or (restarts > 1 and seed is None) or budget.limited
+        else ResultCache(cache_dir, cache_size)
+    )
+    key, cached = None, None
+    if cache:
+        options = {"margin": DEFAULT_MARGIN if margin is None else margin, "engine": engine, "strength": strength}
+        key, cached = load_cached(
+            cache,
+            check.file,
+            dict(options, restarts=restarts, seed=seed, minimise=minimise, seed_suite=seed_configurations),
+            cache_info,
+        )
+
+    # CSV piped to stdout is not mixed with numbered configurations and other output
+    to_stdout = output is not None and output.name == "<stdout>"
+    binary = output_format == "binary" and output is not None
+    model = ParametersModel(check.file)
+    with ConfigurationWriter(
+        kinds,
+        output.buffer if binary else output,
+        print_rows=not to_stdout,
+        parameters=check.file["Parameters"] if binary else None,
+        cost=model.cost if "Costs" in check.file else None,
+    ) as writer:
+        if cached:
+            pairwise, configurations = None, [dict(zip(kinds, row)) for row in cached["configurations"]]
+        else:
+            pairwise, configurations = generate(
+                engine_class, check.file, margin, restarts, jobs, seed, seed_configurations, stats, budget, minimise
+            )
+        configurations = select_shard(configurations, shard, writer.cost)
+        for configuration in configurations:
+            writer.write(configuration)
+    echo_cost(writer)
+
+    impossible = cached["impossible"] if cached else implied_impossible(pairwise)
+    unmet = cached["unmet_weights"] if cached else unmet_weights(pairwise)
+    uncovered = cached["uncovered"] if cached else uncovered_combinations(pairwise)
+    if cache and not cached:
+        rows = [list(configuration.values()) for configuration in pairwise.configurations]
+        result = {"configurations": rows, "generated_all": pairwise.generated_all}
+        cache.store(key, dict(result, impossible=impossible, unmet_weights=unmet, uncovered=uncovered))
+    warn_impossible(impossible)
+    warn_unmet(unmet, DEFAULT_MARGIN if margin is None else margin)
+    warn_uncovered(uncovered)
+    if seed_configurations:
+        warn_completed(check.file, seed_configurations)
+    warn_unfinished(cached["generated_all"] if cached else pairwise.generated_all, pairwise, budget)
     if count:
-        pairwise.print_quantity()
+        # Counters of configurations loaded from cache are restored only when they are printed
+        pairwise = pairwise or restore(engine_class, check.file, margin, configurations)
+        pairwise.print_quantity(sys.stderr if to_stdout else None)
+    if profile:
+        click.echo(stats.summary(), err=True)
+    if stats_json:
+        json.dump(stats.to_dict(), stats_json, indent=2)
+
+
+# pylint: disable=too-many-arguments,too-many-positional-arguments
+def generate(engine, parameters, margin, restarts, jobs, seed, seed_configurations, stats, budget=None, minimise=False):
+    """
+    :param engine: Pairwise class used for generation
+    :param parameters: Loaded input file with parameters and optional weights
+    :param margin: Margin of weights
+    :param restarts: Number of generator runs with randomised tie-breaks
+    :param jobs: Number of processes running restarts in parallel
+    :param seed: Seed of randomised restarts
+    :param seed_configurations: Existing configurations which are extended
+    :param stats: Statistics attached to generator
+    :param budget: Budget of generation without restarts
+    :param minimise: Remove redundant configurations after generation and print how many were removed
+    :return: Generator and iterable of all configurations, configurations are generated while iterating
+    when there are no restarts nor minimisation
+    """
+    if restarts > 1:
+        pairwise, _ = generate_best(
+            engine, parameters, margin, restarts, jobs, seed, configurations=seed_configurations
+        )
+    else:
+        pairwise = engine(parameters, margin)
+        pairwise.extend(seed_configurations)
+        pairwise.budget = budget
+        if stats:
+            stats.attach(pairwise)
+        if not minimise:
+            return pairwise, itertools.chain(pairwise.configurations, pairwise.iter_configurations())
+        pairwise.generate_configurations()
+    if minimise:
+        generated = len(pairwise.rows)
+        click.echo(f"Minimisation removed {pairwise.minimise()} of {generated} configurations", err=True)
+    return pairwise, pairwise.configurations
+
+
+def check_restarts(restarts, stats, budget):
+    """
+    :param restarts: Number of generator runs with randomised tie-breaks
+    :param stats: Statistics attached to generator, None when they are not collected
+    :param budget: Budget of generation
+    """
+    if restarts > 1 and stats:
+        raise click.UsageError("Options --profile and --stats-json cannot be used with --restarts.")
+    if restarts > 1 and budget.limited:
+        raise click.UsageError("Options --time-budget and --max-configurations cannot be used with --restarts.")
+
+
+def warn_unfinished(generated_all, pairwise, budget):
+    """
+    Warn about configurations which don't meet the requirements
+    :param generated_all: True if configurations meet the requirements
+    :param pairwise: Generator with generated configurations, None when they were loaded from cache
+    :param budget: Budget of generation
+    """
+    if generated_all:
+        return
+    if budget.exhausted:
+        warnings.warn(
+            f"Generation budget ran out after {len(pairwise.rows)} configurations, "
+            f"maximal divergence is {pairwise.max_divergence():.4f} (margin {pairwise.margin})"
+        )
+    else:
+        warnings.warn("No more unique configuration meeting the requirements")
+
+
+def parse_shard(shard):
+    """
+    :param shard: Shard as I/N, None when not given
+    :return: Index of shard starting from 0 and number of shards, None when not given
+    """
+    if shard is None:
+        return None
+    index, _, count = shard.partition("/")
+    if not (index.isdigit() and count.isdigit() and 1 <= int(index) <= int(count)):
+        raise click.BadParameter(f"'{shard}' is not shard I/N with 1 <= I <= N.")
+    return int(index) - 1, int(count)
+
+
+def echo_cost(writer):
+    """
+    Print total cost of written configurations to stderr when parameters have costs
+    :param writer: Writer of configurations
+    """
+    if writer.total_cost is not None:
+        click.echo(f"Total cost of {writer.count} configurations: {writer.total_cost:g}", err=True)
+
+
+def select_shard(configurations, shard, cost=None):
+    """
+    Split configurations into shards and print coverage of each shard to stderr
+    :param configurations: All configurations as dictionaries of kinds and values
+    :param shard: Index of shard starting from 0 and number of shards, None when not given
+    :param cost: Function returning cost of configuration, shards are balanced by number of configurations
+    when not given
+    :return: Configurations of given shard, all configurations when shard is not given
+    """
+    if shard is None:
+        return configurations
+    configurations, (index, count) = list(configurations), shard
+    costs = [cost(configuration) for configuration in configurations] if cost else None
+    sharding = Sharding([list(configuration.values()) for configuration in configurations], count, costs)
+    for line in sharding.report():
+        click.echo(line, err=True)
+    return [configurations[row] for row in sharding.shard(index)]
+
+
+def restore(engine, parameters, margin, configurations):
+    """
+    :param engine: Pairwise class used for generation
+    :param parameters: Loaded input file with parameters and optional weights
+    :param margin: Margin of weights
+    :param configurations: Configurations loaded from cache
+    :return: Generator with given configurations
+    """
+    pairwise = engine(parameters, margin)
+    pairwise.extend(configurations)
+    return pairwise
+
+
+def load_cached(cache, parameters, options, cache_info):
+    """
+    :param cache: Result cache
+    :param parameters: Loaded input file with parameters and optional weights
+    :param options: Options which affect generated configurations
+    :param cache_info: Print whether configurations were loaded from cache
+    :return: Key of result and cached result, None if result is not cached
+    """
+    key = cache.key(parameters, **options)
+    cached = cache.load(key)
+    if cache_info:
+        click.echo(f"Cache {'hit' if cached else 'miss'}: {key}", err=True)
+    return key, cached
+
+
+for command in (batch, serve, client, verify):
+    main.add_command(command)
 
 
 if __name__ == "__main__":
-    main()  # pylint: disable=no-value-for-parameter
+    main(prog_name="pairwise")
@@ -0,0 +1,135 @@
+"""Post-generation minimisation of configurations for pairwise tool"""
+import itertools
+from collections import Counter
+
+# Number of following low-value configurations each configuration is tried to be merged with
+MERGE_WINDOW = 64
+
+
+# pylint: disable=too-many-instance-attributes
+class Minimiser:  # pylint: disable=too-few-public-methods
+    """
+    Removal of redundant configurations. Every combination of parameters keeps count of configurations covering it,
+    so configuration whose combinations are all covered more than once is found without scanning other
+    configurations. Redundant configurations are removed from the last one, since configurations added late
+    cover the fewest new combinations, then pairs of configurations whose combinations covered only by them fit
+    into one configuration are merged. Change is kept only when it doesn't break more ratio requirements.
+    """
+
+    def __init__(self, rows, strength, allows, violations):
+        """
+        :param rows: Configurations as tuples of parameter ids
+        :param strength: Number of parameters in covered combinations
+        :param allows: Function returning True if configuration is allowed by constraints
+        :param violations: Function returning parameters breaking ratio requirements for given count
+        of configurations containing each parameter and number of configurations
+        """
+        self.rows = list(rows)
+        self.strength = strength
+        self.allows = allows
+        self.violations = violations
+        self.alive = [True] * len(self.rows)
+        self.total = len(self.rows)
+        self.counts = Counter(combination for row in self.rows for combination in self._combinations(row))
+        self.quantity = Counter(param for row in self.rows for param in row)
+        self._allowed_violations = self.violations(self.quantity, self.total)
+
+    def _combinations(self, row):
+        """
+        :param row: Configuration as tuple of parameter ids
+        :return: Combinations of parameters covered by configuration
+        """
+        return itertools.combinations(row, self.strength)
+
+    def minimise(self):
+        """
+        :return: Remaining configurations in their original order, merged configuration replaces the first one
+        """
+        for index in reversed(range(len(self.rows))):
+            if all(self.counts[combination] > 1 for combination in self._combinations(self.rows[index])):
+                self._change([index], [])
+        while self._merge():
+            pass
+        return [row for row, alive in zip(self.rows, self.alive) if alive]
+
+    def _change(self, removed, added):
+        """
+        Replace configurations when all combinations stay covered and ratio requirements are not broken more
+        :param removed: Indexes of removed configurations
+        :param added: Pairs of index and configuration which is stored at index
+        :return: True if configurations were replaced, False otherwise
+        """
+        old = [self.rows[index] for index in removed]
+        new = [row for _, row in added]
+        for row in old:
+            self.counts.subtract(self._combinations(row))
+            self.quantity.subtract(row)
+        for row in new:
+            self.counts.update(self._combinations(row))
+            self.quantity.update(row)
+        total = self.total - len(old) + len(new)
+        if all(self.counts[combination] > 0 for row in old for combination in self._combinations(row)) and (
+            self.violations(self.quantity, total) <= self._allowed_violations
+        ):
+            for index in removed:
+                self.alive[index] = False
+            for index, row in added:
+                self.rows[index] = row
+                self.alive[index] = True
+            self.total = total
+            return True
+        for row in new:
+            self.counts.subtract(self._combinations(row))
+            self.quantity.subtract(row)
+        for row in old:
+            self.counts.update(self._combinations(row))
+            self.quantity.update(row)
+        return False
+
+    def _required(self, row):
+        """
+        :param row: Configuration as tuple of parameter ids
+        :return: Parameters of combinations covered only by given configuration by their position
+        """
+        return {
+            position: param
+            for combination in self._combinations(row)
+            if self.counts[combination] == 1
+            for position, param in enumerate(row)
+            if param in combination
+        }
+
+    def _merge(self):
+        """
+        Merge two configurations into one, which keeps parameters of combinations covered only by them
+        :return: True if any configurations were merged, False otherwise
+        """
+        existing = {row for row, alive in zip(self.rows, self.alive) if alive}
+        # Parameters of configurations which leave some position free, they may get outdated by merges, but every
+        # merge is checked against current counts
+        required = {}
+        for index, alive in enumerate(self.alive):
+            if alive and len(params := self._required(self.rows[index])) < len(self.rows[index]):
+                required[index] = params
+        candidates = sorted(required, key=lambda index: len(required[index]))
+        merged = False
+        used = set()
+        for position, first in enumerate(candidates):
+            if first in used:
+                continue
+            for second in candidates[position + 1 : position + 1 + MERGE_WINDOW]:
+                if second in used:
+                    continue
+                if any(required[first].get(kind, param) != param for kind, param in required[second].items()):
+                    continue
+                row = tuple(required[second].get(kind, param) for kind, param in enumerate(self.rows[first]))
+                if row in existing or not self.allows(row):
+                    continue
+                replaced = (self.rows[first], self.rows[second])
+                if self._change([first, second], [(first, row)]):
+                    existing.difference_update(replaced)
+                    existing.add(row)
+                    used.update((first, second))
+                    merged = True
+                    break
+        return merged
@@ -0,0 +1,46 @@
+"""Multi-start generation for pairwise tool"""
+import itertools
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+
+# pylint: disable=too-many-arguments,too-many-positional-arguments
+def generate_best(engine, parameters, margin, restarts, jobs=1, seed=None, configurations=None):
+    """
+    Generate configurations several times with randomised tie-breaks and keep the smallest suite.
+    First restart always breaks ties in order of parameters, so result is never worse than single run.
+    :param engine: Pairwise class used for generation
+    :param parameters: Loaded input file with parameters and optional weights
+    :param margin: Margin of weights
+    :param restarts: Number of generator runs
+    :param jobs: Number of worker processes
+    :param seed: Seed from which seeds of randomised restarts are derived
+    :param configurations: Existing configurations which are extended in each restart
+    :return: Generator with the smallest suite meeting ratio requirements, or the smallest suite when none
+    of them meets the requirements, and whether the requirements were met
+    """
+    seed_generator = random.Random(seed)
+    seeds = [None] + [seed_generator.randrange(2**32) for _ in range(restarts - 1)]
+    arguments = (
+        itertools.repeat(engine),
+        itertools.repeat(parameters),
+        itertools.repeat(margin),
+        seeds,
+        itertools.repeat(configurations or []),
+    )
+    if jobs > 1 and restarts > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, restarts)) as executor:
+            results = list(executor.map(_generate, *arguments))
+    else:
+        results = list(map(_generate, *arguments))
+    return min(results, key=lambda result: (not result[1], len(result[0].rows)))
+
+
+def _generate(engine, parameters, margin, seed, configurations):
+    """
+    :return: Generator with generated configurations and whether they meet ratio requirements
+    """
+    pairwise = engine(parameters, margin, seed)
+    pairwise.extend(configurations)
+    generated_all = pairwise.generate_configurations()
+    return pairwise, generated_all
@@ -0,0 +1,151 @@
+"""NumPy engine for pairwise tool"""
+import numpy as np
+
+from .pair_coverage import PairCoverage
+from .pairwise import Pairwise
+
+
+class MatrixPairCoverage(PairCoverage):
+    """
+    Store of uncovered pairs which additionally keeps uncovered pairs as symmetric boolean matrix
+    of all parameters, blocks of which are matrices of every two kinds. Last row stands for unfilled
+    position of configuration, so whole batches of configurations can be scored at once.
+    """
+
+    def __init__(self, kind_of, kind_params, on_finished=None):
+        """
+        :param kind_of: Kind of each parameter id, ids of one kind are consecutive
+        :param kind_params: Range of parameter ids of each kind
+        :param on_finished: Callback called with parameter id once all its pairs are covered
+        """
+        self.kind_params = kind_params
+        kinds = np.array(kind_of)
+        self.matrix = np.zeros((len(kind_of) + 1, len(kind_of)), dtype=bool)
+        self.matrix[:-1] = kinds[:, None] != kinds[None, :]
+        super().__init__(kind_of, on_finished)
+
+    def cover(self, param1, param2):
+        """
+        Mark pair as covered
+        :return: True if pair was uncovered before, False otherwise
+        """
+        if not super().cover(param1, param2):
+            return False
+        self.matrix[param1, param2] = False
+        self.matrix[param2, param1] = False
+        return True
+
+    def kind_matrix(self, kind1, kind2):
+        """
+        :return: Boolean matrix of uncovered pairs of parameters of given kinds
+        """
+        params1, params2 = self.kind_params[kind1], self.kind_params[kind2]
+        return self.matrix[params1.start : params1.stop, params2.start : params2.stop]
+
+    def gains(self, rows, kind):
+        """
+        :param rows: Matrix of partially filled configurations, -1 for unfilled positions
+        :param kind: Kind which is going to be filled
+        :return: Matrix with number of uncovered pairs each parameter of kind would cover in each configuration
+        """
+        params = self.kind_params[kind]
+        return self.matrix[:, params.start : params.stop][rows].sum(axis=1, dtype=np.int32)
+
+    def new_pairs(self, rows):
+        """
+        :param rows: Matrix of complete configurations
+        :return: Number of uncovered pairs each parameter of each configuration would cover
+        """
+        return self.matrix[rows[:, :, None], rows[:, None, :]].sum(axis=2, dtype=np.int32)
+
+
+class NumpyPairwise(Pairwise):  # pylint: disable=too-few-public-methods
+    """
+    Pairwise configurations generator which builds batch of candidate configurations at once,
+    each seeded with different uncovered pair of main parameter, and adds the one covering most pairs
+    """
+
+    batch_size = 32
+
+    def _generate_pairs(self):
+        """
+        :return: Coverage store with all possible pairs from given parameters
+        """
+        return MatrixPairCoverage(self.model.kind_of, self.model.kind_params, self._param_finished)
+
+    def _generate_configuration(self):
+        """Generate next configuration in pairwise"""
+        param_quantity = self._parameter_quantity()
+        degree = np.array(param_quantity)
+        param = self._main_param(self._sorted_params(param_quantity))
+        priority = self._priority(degree)
+        rows = self._candidates(param, degree, priority)
+
+        new_pairs = self.pairs.new_pairs(rows)
+        covered = new_pairs.sum(axis=1) // 2
+        # Candidates covering same number of pairs are preferred when they finish parameters with fewest pairs,
+        # which keeps remaining pairs concentrated on fewer parameters
+        fragmentation = (new_pairs * (2 * degree[rows] - new_pairs)).sum(axis=1)
+        balance = priority[rows].sum(axis=1)
+        order = np.lexsort((-balance, fragmentation, -covered))
+        for index in order:
+            configuration = tuple(int(param) for param in rows[index])
+            if configuration not in self.rows and self.constraints.allows(configuration):
+                return self._add_configuration(configuration, param)
+        return self._add_configuration(tuple(int(param) for param in rows[order[0]]), param)
+
+    def _candidates(self, param, degree, priority):
+        """
+        :param param: Main parameter of configuration
+        :param degree: Number of uncovered pairs of each parameter
+        :param priority: Priority of each parameter
+        :return: Matrix of candidate configurations, each one seeded with another uncovered pair of main parameter
+        and greedily filled kind by kind with parameters covering most uncovered pairs
+        """
+        kind_of = self.model.kind_of
+        tie_breaks = self._tie_breaks(len(self.model))
+        partners = sorted(self.pairs.partners(param), key=lambda partner: (-degree[partner], tie_breaks[partner]))
+        rows = np.full((max(1, min(len(partners), self.batch_size)), len(self.model.kinds)), -1)
+        rows[:, kind_of[param]] = param
+        for i, partner in enumerate(partners[: len(rows)]):
+            rows[i, kind_of[partner]] = partner
+
+        for kind in self._kind_numerosity():
+            todo = rows[:, kind] < 0
+            if not todo.any():
+                continue
+            params = self.model.kind_params[kind]
+            score = self.pairs.gains(rows[todo], kind) + priority[params.start : params.stop]
+            if not self.constraints.constrained.isdisjoint(params):
+                score = np.where(self._fitting(rows[todo], params), score, -np.inf)
+            rows[todo, kind] = params.start + np.argmax(score, axis=1)
+        return rows
+
+    def _fitting(self, rows, params):
+        """
+        :param rows: Matrix of partially filled configurations which can be completed without breaking constraints,
+        -1 for unfilled positions
+        :param params: Parameters of kind which is going to be filled
+        :return: Boolean matrix whether each configuration can still be completed with each parameter
+        """
+        fitting = np.ones((len(rows), len(params)), dtype=bool)
+        for i, row in enumerate(rows):
+            configuration = [None if param < 0 else int(param) for param in row]
+            for j, param in enumerate(params):
+                configuration[self.model.kind_of[param]] = param
+                fitting[i, j] = self.constraints.extends(configuration, param)
+            configuration[self.model.kind_of[params.start]] = None
+        return fitting
+
+    def _priority(self, degree):
+        """
+        :param degree: Number of uncovered pairs of each parameter
+        :return: Score below 1 preferring parameters with more uncovered pairs and then parameters
+        most missing to their ratio, finished parameters tested only pairwise are excluded
+        """
+        deficit = np.array(self.parameters_ratio) * (len(self.rows) + 1) - np.array(self.quantity)
+        priority = 0.5 * degree / (degree.max() + 1) + 0.25 * (deficit - deficit.min()) / (np.ptp(deficit) + 1)
+        for param in self.only_pairwise:
+            if not degree[param]:
+                priority[param] -= len(self.model.kinds) ** 2
+        return priority
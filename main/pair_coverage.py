@@ -0,0 +1,92 @@
+"""Pair coverage class for pairwise tool"""
+import itertools
+
+
+class PairCoverage:
+    """
+    Store of uncovered pairs of parameter ids. Every parameter keeps set of its uncovered
+    partners, so membership, removal and lookup of all uncovered partners of a parameter
+    are constant-time operations.
+    """
+
+    def __init__(self, kind_of, on_finished=None):
+        """
+        :param kind_of: Kind of each parameter id, ids of one kind are consecutive
+        :param on_finished: Callback called with parameter id once all its pairs are covered
+        """
+        self.kind_of = kind_of
+        self.on_finished = on_finished
+        self._partners = [set() for _ in kind_of]
+        self._count = 0
+        for param1, param2 in itertools.combinations(range(len(kind_of)), 2):
+            if kind_of[param1] != kind_of[param2]:
+                self._partners[param1].add(param2)
+                self._partners[param2].add(param1)
+                self._count += 1
+        if on_finished:
+            for param, partners in enumerate(self._partners):
+                if not partners:
+                    on_finished(param)
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, pair):
+        param1, param2 = pair
+        return param1 is not None and param2 in self._partners[param1]
+
+    def __iter__(self):
+        """
+        :return: Uncovered pairs in the order in which they were generated
+        """
+        pairs = [(param1, param2) for param1, partners in enumerate(self._partners) for param2 in partners]
+        return iter(sorted((pair for pair in pairs if pair[0] < pair[1]), key=lambda pair: self.order_key(*pair)))
+
+    def partners(self, param):
+        """
+        :param param:
+        :return: Set of parameters which form uncovered pair with given parameter
+        """
+        return self._partners[param]
+
+    def degree(self, param):
+        """
+        :param param:
+        :return: Number of uncovered pairs containing given parameter
+        """
+        return len(self._partners[param])
+
+    def cover(self, param1, param2):
+        """
+        Mark pair as covered
+        :return: True if pair was uncovered before, False otherwise
+        """
+        partners = self._partners[param1]
+        if param2 not in partners:
+            return False
+        partners.remove(param2)
+        self._partners[param2].remove(param1)
+        self._count -= 1
+        if self.on_finished:
+            if not partners:
+                self.on_finished(param1)
+            if not self._partners[param2]:
+                self.on_finished(param2)
+        return True
+
+    def cover_row(self, row):
+        """
+        Mark all pairs in (possibly partially filled) configuration as covered
+        :param row: Parameter ids of configuration, None for unfilled positions
+        """
+        filled = [param for param in row if param is not None]
+        for param1, param2 in itertools.combinations(filled, 2):
+            self.cover(param1, param2)
+
+    def order_key(self, param1, param2):
+        """
+        :return: Key ordering pairs in the same way as they were generated
+        """
+        if param1 > param2:
+            param1, param2 = param2, param1
+        return self.kind_of[param1], self.kind_of[param2], param1, param2
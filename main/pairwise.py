@@ -1,119 +1,397 @@
 """Pairwise class"""
 import csv
-import itertools
 import math
+import random
 from pprint import pprint
 
+from .best_first import best_first_product
+from .compiled_parameters import CompiledParameters
+from .configuration_store import ConfigurationStore, ConfigurationView
+from .divergences import Divergences
+from .minimiser import Minimiser
+from .pair_coverage import PairCoverage
+
+DEFAULT_MARGIN = 0.05
+# Suites up to this multiple of current number of configurations are searched for quotas meeting weights
+QUOTA_SEARCH_FACTOR = 100
+# Balancing stops once suite doubled since it last got 1 % closer to ratio requirements, constraints may keep
+# configurations from filling quotas of any suite
+BALANCE_GROWTH, BALANCE_PROGRESS = 2, 0.01
+
 
 # pylint: disable=too-many-instance-attributes
 class Pairwise:
-    """Pairwise configurations generator"""
+    """
+    Pairwise configurations generator. Parameters are handled as integer ids
+    of compiled ParametersModel and mapped back to user values only on output.
+    """
 
-    def __init__(self, parameters, margin):
-        self.configurations = []
+    strength = 2
+
+    def __init__(self, parameters, margin, seed=None, compiled=None):
+        """
+        :param parameters: Loaded input file with parameters and optional weights
+        :param margin: Margin of weights
+        :param seed: Seed for random tie-breaks of equally good parameters, ties are broken
+        in order of parameters when not given
+        :param compiled: Compiled parameters of the same input file, they are compiled when not given
+        """
+        compiled = compiled or CompiledParameters(parameters)
+        self.model = compiled.model
+        self.random = random.Random(seed) if seed is not None else None
+        # Generated configurations as tuples of parameter ids in kind order
+        self.rows = ConfigurationStore(len(self.model.kinds), len(self.model))
+        self.quantity = [0] * len(self.model)
+        self._used_params = []
+        self._used_kind_params = [[] for _ in self.model.kinds]
+        self._unfinished_params = [len(params) for params in self.model.kind_params]
+        self._finished_kinds = []
+        self._kld = Divergences(self)
+        self.generated_all = None
         self.finished_parameters = set()
         self.parameters = parameters["Parameters"]
         self.weights = parameters.get("Weights", {})
-        self.only_pairwise = [k for k, v in self.weights.items() if v == 0]
+        self.only_pairwise = {param for param, weight in enumerate(self.model.weights) if weight == 0}
+        # Cheaper parameters are preferred where choice doesn't affect coverage or ratio requirements, costs
+        # of kinds with parameters tested only pairwise are ignored, their count is fixed once their pairs are covered
+        self.costs = [
+            0 if self.only_pairwise.intersection(self.model.kind_params[self.model.kind_of[param]]) else cost
+            for param, cost in enumerate(self.model.costs)
+        ]
+        self.cost_aware = any(self.costs)
         self.parameters_ratio = self._create_ratio()
+        self.constraints = compiled.constraints
         self.pairs = self._generate_pairs()
-        self.margin = margin if margin is not None else 0.05
+        # Combinations which are in no configuration allowed by constraints are removed from uncovered ones
+        self.impossible = compiled.impossible(self.strength)
+        for combination in self.impossible:
+            configuration = [None] * len(self.model.kinds)
+            for param in combination:
+                configuration[self.model.kind_of[param]] = param
+            self.pairs.cover_row(configuration)
+        self.margin = margin if margin is not None else DEFAULT_MARGIN
+        self.unmet_weights = []
+        self._bounds = {}
+        # The lowest maximal divergence of balanced suites and number of configurations of that suite
+        self._closest = (math.inf, 0)
+        self.budget = None
 
-    def _create_ratio(self):
+    @property
+    def configurations(self):
+        """
+        :return: Generated configurations as dictionaries of kinds and values, they are decoded on access
+        """
+        return ConfigurationView(self.rows, self.model)
+
+    def extend(self, configurations):
+        """
+        Add existing configurations, their pairs are covered, so only configurations needed for remaining pairs
+        and ratio requirements are generated. Missing or unknown values (e.g. of changed parameters) are completed
+        with parameters covering the most uncovered pairs, configurations which are already present or break
+        constraints are skipped.
+        :param configurations: Configurations as dictionaries of kinds and values
+        :return: Number of configurations which had to be completed
+        """
+        completed = 0
+        for configuration in configurations:
+            row = self.model.encode(configuration)
+            if not self.constraints.allows(row):
+                continue
+            if None in row:
+                row = self._complete_configuration(list(row))
+                completed += 1
+            if row not in self.rows:
+                self._append_configuration(row)
+        self._check_finished_kind()
+        return completed
+
+    def _complete_configuration(self, configuration):
         """
-        :return: Dictionary with expected ratios for each parameter
+        :param configuration: Partially filled configuration, None for unfilled positions
+        :return: Configuration filled kind by kind with parameters allowed by constraints covering the most
+        uncovered pairs, parameters most missing to their ratio are preferred among them
         """
-        parameters_ratio = {}
-        ratio_sum = {}
-        for kind in self.parameters:
-            ratio_sum[kind] = 0
-            parameters_ratio[kind] = {}
-            for param in self.parameters[kind]:
-                parameters_ratio[kind][param] = self.weights.get(param) if self.weights.get(param) else 1
-                ratio_sum[kind] += parameters_ratio[kind][param]
+        for kind, value in enumerate(configuration):
+            if value is None:
+                configuration[kind] = max(
+                    self.model.kind_params[kind],
+                    key=lambda param: (
+                        self._fits(configuration, param),
+                        sum((param, other) in self.pairs for other in configuration),
+                        self._deficit(param),
+                    ),
+                )
+        return tuple(configuration)
 
-        for kind, parameters in parameters_ratio.items():
-            for param in parameters:
-                parameters[param] /= ratio_sum[kind]
+    def _repair_configuration(self, configuration, main_param):
+        """
+        :param configuration: Configuration breaking constraints
+        :param main_param: Parameter from which was configuration created
+        :return: Configuration keeping parameters which fit together, starting with main parameter,
+        and completed with parameters allowed by constraints
+        """
+        repaired = [None] * len(self.model.kinds)
+        for param in [main_param] + list(configuration):
+            if repaired[self.model.kind_of[param]] is None and self._fits(repaired, param):
+                repaired[self.model.kind_of[param]] = param
+        return self._complete_configuration(repaired)
+
+    def _fits(self, configuration, *params):
+        """
+        :param configuration: Partially filled configuration which can be completed without breaking constraints
+        :param params: Parameters of different kinds which are going to be added to configuration
+        :return: True if configuration with given parameters can still be completed without breaking constraints,
+        False otherwise
+        """
+        if self.constraints.constrained.isdisjoint(params):
+            return True
+        trial = list(configuration)
+        for param in params:
+            trial[self.model.kind_of[param]] = param
+        return self.constraints.complete(trial) is not None
+
+    def _deficit(self, param):
+        """
+        :param param:
+        :return: Number of configurations parameter is missing to its ratio, finished parameters tested
+        only pairwise are last
+        """
+        if param in self.only_pairwise and self._check_finished_param(param):
+            return -len(self.rows) - 1
+        return self.parameters_ratio[param] * (len(self.rows) + 1) - self.quantity[param]
+
+    def _create_ratio(self):
+        """
+        :return: List with expected ratio for each parameter
+        """
+        parameters_ratio = [weight if weight else 1 for weight in self.model.weights]
+        for params in self.model.kind_params:
+            ratio_sum = 0
+            for param in params:
+                ratio_sum += parameters_ratio[param]
+            for param in params:
+                parameters_ratio[param] /= ratio_sum
         return parameters_ratio
 
     def _generate_pairs(self):
         """
-        :return: All possible pairs from given parameters
+        :return: Coverage store with all possible pairs from given parameters
         """
-        pairs = []
-        parameter_pairs = list(itertools.combinations(self.parameters, 2))
+        return PairCoverage(self.model.kind_of, self._param_finished)
 
-        for param1, param2 in parameter_pairs:
-            for value1 in self.parameters[param1]:
-                for value2 in self.parameters[param2]:
-                    pairs.append({value1, value2})
-
-        return pairs
+    def _param_finished(self, param):
+        """
+        Called by coverage store once all pairs of parameter are covered
+        :param param:
+        """
+        kind = self.model.kind_of[param]
+        self._unfinished_params[kind] -= 1
+        if not self._unfinished_params[kind]:
+            self._finished_kinds.append(kind)
 
     def generate_configurations(self):
-        """Generate all pairwise configurations for given parameters"""
-        ratio_done = False
+        """
+        Generate all pairwise configurations for given parameters
+        :return: True if generated configurations meet ratio requirements, False otherwise
+        """
+        for _ in self.iter_configurations():
+            pass
+        return self.generated_all
+
+    def minimise(self):
+        """
+        Remove redundant configurations and merge configurations which fit into one, covered combinations
+        are kept and ratio requirements are not broken more than in generated configurations
+        :return: Number of removed configurations
+        """
+        minimiser = Minimiser(list(self.rows), self.strength, self.constraints.allows, self.violations)
+        rows = minimiser.minimise()
+        removed = len(self.rows) - len(rows)
+        self._replace_configurations(rows)
+        if self.unmet_weights:
+            self.unmet_weights = sorted(self.violations(self.quantity, len(self.rows)))
+        return removed
 
-        while self.pairs or not ratio_done:
+    def _replace_configurations(self, rows):
+        """
+        Replace generated configurations and recount parameter usage, given configurations cover the same pairs
+        :param rows: Configurations as tuples of parameter ids
+        """
+        self.rows = ConfigurationStore(len(self.model.kinds), len(self.model))
+        self.quantity = [0] * len(self.model)
+        self._used_params = []
+        self._used_kind_params = [[] for _ in self.model.kinds]
+        self._kld = Divergences(self)
+        # Kept configurations are stored without the hook of generated ones, so statistics don't count them again
+        for row in rows:
+            self._store_configuration(row)
+
+    def max_divergence(self):
+        """
+        :return: The highest absolute KL divergence of parameter with ratio requirement in current configurations
+        """
+        kld = self._kl_divergence()
+        return max((abs(ratio) for param, ratio in kld.items() if param not in self.only_pairwise), default=0)
+
+    def _report_progress(self):
+        """
+        Report progress of generation when it is due
+        """
+        if self.budget is not None and self.budget.report_due():
+            self.budget.report(len(self.rows), len(self.pairs), self.max_divergence())
+
+    def _budget_spent(self, pending=0):
+        """
+        Report progress of generation when it is due
+        :param pending: Number of configurations which are going to be added
+        :return: True if budget of generation ran out, False otherwise
+        """
+        self._report_progress()
+        return self.budget is not None and self.budget.spent(len(self.rows) + pending)
+
+    def divergences(self, quantity, total):
+        """
+        :param quantity: Number of configurations containing each parameter
+        :param total: Number of configurations
+        :return: KL divergence of each parameter with ratio requirement
+        """
+        return {
+            param: self._divergence(param, quantity[param] / total if total else 0)
+            for param in range(len(self.model))
+            if param not in self.only_pairwise
+        }
+
+    def violations(self, quantity, total):
+        """
+        :param quantity: Number of configurations containing each parameter
+        :param total: Number of configurations
+        :return: Parameters whose ratio is not within margin
+        """
+        return {
+            param
+            for param, divergence in self.divergences(quantity, total).items()
+            if not self._meets_margin(divergence)
+        }
+
+    def iter_configurations(self):
+        """
+        Generate pairwise configurations for given parameters one by one, generated_all is set once generation ends
+        :return: Generator of configurations as dictionaries of kinds and values, each one is yielded
+        as soon as it is added
+        """
+        self.generated_all = False
+        # Weights which can't be met in any suite are found before anything is generated, so generation ends
+        # once pairs are covered
+        used = [
+            None if param in self.only_pairwise else int(bool(self.pairs.degree(param)))
+            for param in range(len(self.model))
+        ]
+        unreachable = self._quotas(used, 1) is None
+
+        # Budget limits only configurations added to meet weights, every pair is covered regardless of it
+        while self.pairs:
+            self._report_progress()
             if not self._generate_configuration():
-                return False
+                return
             self._check_finished_kind()
-            if not self.pairs:
-                ratio_done = self._check_ratio()
-        return True
+            yield self.model.decode(self.rows[-1])
+        if unreachable:
+            self.unmet_weights = sorted(self.violations(self.quantity, len(self.rows)))
+        if self.unmet_weights:
+            return
+
+        # Budgeted generation yields configurations once they bring suite closer to ratio requirements
+        # than before, so the ones after the closest suite are removed when balancing ends unfinished
+        best, limited = self.max_divergence(), self.budget is not None and self.budget.limited
+        held = []
+        while not self._check_ratio():
+            balanced = False
+            for configuration in self._balance():
+                balanced = True
+                held.append(configuration)
+                if limited:
+                    divergence = self.max_divergence()
+                    if divergence >= best:
+                        continue
+                    best = divergence
+                yield from held
+                held = []
+            if not balanced:
+                if held:
+                    self._replace_configurations(list(self.rows)[: len(self.rows) - len(held)])
+                    if self.unmet_weights:
+                        self.unmet_weights = sorted(self.violations(self.quantity, len(self.rows)))
+                return
+        yield from held
+        self.generated_all = True
 
     def to_csv(self, output):
         """
-        :param output: Output file
+        :param output: Output file, it is left open
         Generate CSV file containing generated configurations
         """
         writer = csv.writer(output)
-        writer.writerow(self.configurations[0].keys())
-        for conf in self.configurations:
-            writer.writerow(conf.values())
-        output.close()
+        writer.writerow(self.model.kinds)
+        writer.writerows([self.model.values[param] for param in row] for row in self.rows)
 
-    def print_quantity(self):
-        """Print quantity of each parameter in generated configurations"""
-        quantity = self._count_quantity()
-        pprint(sorted(quantity.items(), key=lambda x: x[1]))
+    def print_quantity(self, stream=None):
+        """
+        Print quantity of each parameter in generated configurations
+        :param stream: Output stream, default is stdout
+        """
+        quantity = [(self.model.label(param), value) for param, value in self._count_quantity().items()]
+        pprint(sorted(quantity, key=lambda x: x[1]), stream=stream)
 
     def print_configurations(self):
         """Print generated configurations"""
-        for i, conf in enumerate(self.configurations):
-            print(f"{i + 1}: {list(conf.values())}")
+        for i, row in enumerate(self.rows):
+            print(f"{i + 1}: {[self.model.values[param] for param in row]}")
 
     def _count_quantity(self):
         """
-        :return: Quantity of each parameter in current configurations
+        :return: Quantity of each parameter in current configurations in order of first usage,
+        unused parameters are last
         """
-        quantity = {}
-        for conf in self.configurations:
-            for param in conf.values():
-                if quantity.get(param):
-                    quantity[param] += 1
-                else:
-                    quantity[param] = 1
+        quantity = {param: self.quantity[param] for param in self._used_params}
+        if len(quantity) != len(self.model):
+            for param in range(len(self.model)):
+                if param not in quantity:
+                    quantity[param] = 0
 
         return quantity
 
+    def _append_configuration(self, configuration):
+        """
+        Append generated configuration, generation statistics instrument this method
+        :param configuration: Configuration as tuple of parameter ids
+        """
+        self._store_configuration(configuration)
+
+    def _store_configuration(self, configuration):
+        """
+        Store configuration and update counters of parameter usage and covered pairs
+        :param configuration: Configuration as tuple of parameter ids
+        """
+        for param in configuration:
+            if not self.quantity[param]:
+                self._used_params.append(param)
+                self._used_kind_params[self.model.kind_of[param]].append(param)
+            self.quantity[param] += 1
+        self.rows.append(configuration)
+        self.pairs.cover_row(configuration)
+
     def _generate_configuration(self):
         """Generate next configuration in pairwise"""
-        configuration = dict.fromkeys(self.parameters.keys())
-        param_quantity = self._parameter_quantity()
-        sorted_params = list(sorted(param_quantity, key=param_quantity.get))
-        sorted_params.reverse()
+        kind_of = self.model.kind_of
+        configuration = [None] * len(self.model.kinds)
+        sorted_params = self._sorted_params(self._parameter_quantity())
         is_not_complete = True
-        kind_numerosity = list(sorted(self.parameters, key=lambda x: len(self.parameters.get(x))))
-        kind_numerosity.reverse()
-
-        if self.pairs:
-            param = self._next_param(kind_numerosity, sorted_params)
-        else:
-            param = self._next_quantity_param()
+        param = self._main_param(sorted_params)
         main_param = param
-        position = self._get_kind(param)
+        position = kind_of[param]
+        if not self._fits(configuration, param):
+            # Parameter is in no configuration allowed by constraints
+            return self._add_configuration(self._repair_configuration(configuration, param), param)
         while is_not_complete:
             self._update_pairs(configuration)
             configuration[position] = param
@@ -122,27 +400,75 @@ class Pairwise:
                 continue
             if self._add_transitive_triplet(configuration, param, sorted_params):
                 continue
-            if self._add_any_triplet(configuration, param, sorted_params):
-                continue
 
             for sorted_param in sorted_params:
                 if sorted_param != param:
-                    if not configuration.get(self._get_kind(sorted_param)) and {param, sorted_param} in self.pairs:
-                        configuration[self._get_kind(sorted_param)] = sorted_param
+                    if (
+                        configuration[kind_of[sorted_param]] is None
+                        and (param, sorted_param) in self.pairs
+                        and self._fits(configuration, sorted_param)
+                    ):
+                        configuration[kind_of[sorted_param]] = sorted_param
                         break
 
             self._update_pairs(configuration)
-            for k, v in configuration.items():
-                if not v:
-                    position = k
+            for kind, value in enumerate(configuration):
+                if value is None:
+                    position = kind
                     break
 
-            param = self._param_in_pair(sorted_params, self.pairs, position)
+            param = self._param_in_pair(sorted_params, self.pairs, position, configuration)
             if param is None:
-                param = self._param_not_in_pair(position, sorted_params)
-            is_not_complete = None in configuration.values()
+                param = self._param_not_in_pair(position, sorted_params, configuration)
+            is_not_complete = None in configuration
 
-        return self._add_configuration(configuration, main_param)
+        return self._add_configuration(tuple(configuration), main_param)
+
+    def _main_param(self, sorted_params):
+        """
+        :param sorted_params: List of parameters sorted by quantity
+        :return: Parameter from which next configuration is supposed to be created
+        """
+        param = None
+        if self.pairs:
+            param = self._next_param(self._kind_numerosity(), sorted_params)
+        if param is None:
+            param = self._next_quantity_param()
+        return param
+
+    def _sorted_params(self, param_quantity):
+        """
+        :param param_quantity: Count of how many times is each parameter in remaining pairs
+        :return: List of parameters sorted by quantity, most frequent first
+        """
+        tie_breaks = self._tie_breaks(len(self.model))
+        costs = self.costs
+        sorted_params = list(
+            sorted(range(len(self.model)), key=lambda param: (param_quantity[param], -costs[param], tie_breaks[param]))
+        )
+        sorted_params.reverse()
+        return sorted_params
+
+    def _kind_numerosity(self):
+        """
+        :return: List of parameter kinds sorted by number of their parameters, largest first
+        """
+        tie_breaks = self._tie_breaks(len(self.model.kinds))
+        kind_numerosity = list(
+            sorted(range(len(self.model.kinds)), key=lambda kind: (len(self.model.kind_params[kind]), tie_breaks[kind]))
+        )
+        kind_numerosity.reverse()
+        return kind_numerosity
+
+    def _tie_breaks(self, count):
+        """
+        :param count: Number of items
+        :return: Ranks of items used to break ties, random when generator is seeded
+        """
+        tie_breaks = list(range(count))
+        if self.random:
+            self.random.shuffle(tie_breaks)
+        return tie_breaks
 
     def _add_configuration(self, configuration, main_param):
         """
@@ -151,87 +477,90 @@ class Pairwise:
         :param main_param: Parameter from which was configuration created
         :return: True if configuration was added to list of all generated configurations, False otherwise
         """
-        if configuration not in self.configurations:
-            self.configurations.append(configuration)
+        if not self.constraints.allows(configuration):
+            configuration = self._repair_configuration(configuration, main_param)
+        if configuration not in self.rows and self.constraints.allows(configuration):
+            self._append_configuration(configuration)
         else:
             if conf := self._alter_configuration(configuration):
-                self.configurations.append(conf)
+                self._append_configuration(conf)
             else:
                 conf = self._create_configuration(main_param)
                 if conf:
-                    self.configurations.append(conf)
+                    self._append_configuration(conf)
                 else:
                     return False
         return True
 
-    def _param_not_in_pair(self, position, sorted_params):
+    def _param_not_in_pair(self, position, sorted_params, configuration):
         """
         Add parameter that is not in any untested pair to configuration
         :param position: Position of given parameter
         :param sorted_params: List of parameters sorted by parameter quantity
+        :param configuration: Generated configuration
         :return: Parameter to be added to generated configuration
         """
-        quantity = {}
         param = None
         if position in self.finished_parameters:
-            for conf in self.configurations:
-                if quantity.get(conf[position]):
-                    quantity[conf[position]] += 1
-                else:
-                    quantity[conf[position]] = 1
-            for key in quantity:
-                quantity[key] /= self.weights.get(key) if self.weights.get(key) else 1
+            quantity = {}
+            for key in self._used_kind_params[position]:
+                weight = self.model.weights[key]
+                quantity[key] = self.quantity[key] / (weight if weight else 1)
             sorted_quantity = sorted(quantity, key=quantity.get)
+            if self.cost_aware:
+                # Stable sort keeps the least used first among parameters of the same cost
+                sorted_quantity.sort(key=lambda param: (not self._below_upper_ratio(param), self.costs[param]))
             for sorted_param in sorted_quantity:
                 if sorted_param in self.only_pairwise and self._check_finished_param(sorted_param):
                     continue
+                if not self._fits(configuration, sorted_param):
+                    continue
                 param = sorted_param
                 break
         else:
             for sorted_param in sorted_params:
-                if self._get_kind(sorted_param) == position:
+                if self.model.kind_of[sorted_param] == position:
                     if sorted_param in self.only_pairwise and self._check_finished_param(sorted_param):
                         continue
+                    if not self._fits(configuration, sorted_param):
+                        continue
                     param = sorted_param
                     break
+        if param is None:
+            # All parameters of kind are finished and tested only pairwise, least used one allowed
+            # by constraints is repeated
+            param = min(
+                self.model.kind_params[position],
+                key=lambda param: (not self._fits(configuration, param), self.quantity[param]),
+            )
         return param
 
     def _update_pairs(self, configuration):
         """
-        Remove pairs tested by configuration from list of all pairs
+        Remove pairs tested by configuration from remaining pairs
         :param configuration: Generated configuration
         """
-        used_pairs = [{a, b} for a in configuration.values() for b in configuration.values()]
-        self.pairs = [key for key in self.pairs if key not in used_pairs]
+        self.pairs.cover_row(configuration)
 
     def _parameter_quantity(self):
         """
         :return: Count of how many times is each parameter in remaining pairs
         """
-        quantity = {}
-        for value in self.parameters.values():
-            for param in value:
-                quantity[param] = 0
-
-        for combination in self.pairs:
-            for param in combination:
-                quantity[param] += 1
-
-        return quantity
+        return [self.pairs.degree(param) for param in range(len(self.model))]
 
     def _next_quantity_param(self):
         """
         :return: Parameter from which next configuration is supposed to be created
         """
         quantity = self._count_quantity()
-        for kind in self.parameters_ratio.values():
-            for param, value in kind.items():
-                quantity[param] /= value
+        for param in quantity:
+            quantity[param] /= self.parameters_ratio[param]
         sorted_quantity = sorted(quantity, key=quantity.get)
         for param in sorted_quantity:
             if param in self.only_pairwise and self._check_finished_param(param):
                 continue
             return param
+        return sorted_quantity[0]
 
     def _next_param(self, kind_numerosity, sorted_params):
         """
@@ -245,25 +574,19 @@ class Pairwise:
                 finished_kind = kind
                 break
         for parameter in sorted_params:
-            if self._get_kind(parameter) is finished_kind:
+            if self.model.kind_of[parameter] == finished_kind:
                 if parameter in self.only_pairwise and self._check_finished_param(parameter):
                     continue
                 return parameter
-        print("1")
         return None
 
     def _check_finished_kind(self):
         """
-        :return: List of parameters that are all covered at least once (are finished)
+        Mark parameter kinds whose parameters got all covered at least once (are finished)
+        since previous configuration
         """
-        for kind in self.parameters:
-            is_finished = True
-            for param in self.parameters[kind]:
-                is_finished = self._check_finished_param(param)
-                if not is_finished:
-                    break
-            if is_finished:
-                self.finished_parameters.add(kind)
+        self.finished_parameters.update(self._finished_kinds)
+        self._finished_kinds.clear()
 
     def _check_finished_param(self, param):
         """
@@ -271,60 +594,327 @@ class Pairwise:
         :param param:
         :return: True if parameter is finished, False otherwise
         """
-        is_finished = True
-        for pair in self.pairs:
-            if param in pair:
-                is_finished = False
-                break
-        return is_finished
+        return self.pairs.degree(param) == 0
 
     def _check_ratio(self):
         """
         :return: True when all configurations meet the ratio requirements, False otherwise
         """
         kld = self._kl_divergence()
-        for ratio in kld.values():
-            if self.margin == 0 and ratio != self.margin:
-                return False
-            if self.margin != 0 and abs(ratio) > self.margin:
-                return False
-        return True
+        return all(self._meets_margin(ratio) for param, ratio in kld.items() if param not in self.only_pairwise)
 
-    def _kl_divergence(self):
+    def _meets_margin(self, divergence):
         """
-        :return: KL divergence for each parameter
+        :param divergence: KL divergence of parameter
+        :return: True if divergence is within margin, False otherwise
         """
-        current_ratio = self._count_ratio()
-        kld = {}
-        for param, ratio in current_ratio.items():
-            kld[param] = ratio * math.log(ratio / self.parameters_ratio[self._get_kind(param)][param])
-        return kld
+        return divergence == 0 if self.margin == 0 else abs(divergence) <= self.margin
 
-    def _count_ratio(self):
+    def _below_upper_ratio(self, param):
         """
-        :return: Current ratio for each parameter
+        :param param:
+        :return: True if parameter stays within its highest ratio when it is added to next configuration,
+        False otherwise
         """
-        quantity = self._count_quantity()
-        kind_sum = {}
-        ratio = {}
-        for kind in self.parameters:
-            kind_sum[kind] = 0
-            for param in self.parameters[kind]:
-                kind_sum[kind] += quantity[param]
-        for param, param_quantity in quantity.items():
-            ratio[param] = param_quantity / kind_sum[self._get_kind(param)]
-        return ratio
-
-    def _get_kind(self, param):
+        if param in self.only_pairwise:
+            return True
+        return (self.quantity[param] + 1) / (len(self.rows) + 1) <= self._ratio_bounds(param)[1]
+
+    def _divergence(self, param, ratio):
         """
         :param param:
-        :return Kind of given parameter
+        :param ratio: Ratio of configurations containing parameter
+        :return: KL divergence of parameter with given ratio
+        """
+        return ratio * math.log(ratio / self.parameters_ratio[param]) if ratio else 0
+
+    def _kl_divergence(self):
+        """
+        :return: KL divergence for each parameter, divergences are computed from current counts when they are read
+        """
+        return self._kld
+
+    def _ratio_bounds(self, param):
+        """
+        :param param: Parameter with expected ratio
+        :return: Lowest and highest ratio of configurations containing parameter whose KL divergence is
+        within margin, divergence x * log(x / p) falls from 0 to -p / e and then rises, so bounds are found
+        by bisection on its rising part
+        """
+        if param in self._bounds:
+            return self._bounds[param]
+        expected = self.parameters_ratio[param]
+
+        def bisect(low, high, target):
+            for _ in range(64):
+                middle = (low + high) / 2
+                if middle * math.log(middle / expected) < target:
+                    low = middle
+                else:
+                    high = middle
+            return low if target < 0 else high
+
+        upper = 1 if self._divergence(param, 1) <= self.margin else bisect(expected, 1, self.margin)
+        lower = 0 if expected / math.e <= self.margin else bisect(expected / math.e, expected, -self.margin)
+        self._bounds[param] = (lower, upper)
+        return lower, upper
+
+    def _kind_bounds(self, kind, total, lower):
+        """
+        :param kind:
+        :param total: Number of configurations of suite
+        :param lower: Minimal count of each parameter, e.g. its current quantity, None for parameters tested only
+        pairwise whose count is not known yet
+        :return: Lowest and highest count of configurations of suite containing each parameter of kind meeting ratio
+        requirements, parameters tested only pairwise keep their count unless all parameters of kind are tested
+        only pairwise, None if there are no such counts summing up to number of configurations
         """
-        for key, value in self.parameters.items():
-            if param in value:
-                return key
+        params = self.model.kind_params[kind]
+        weighted = any(param not in self.only_pairwise for param in params)
+        unique = self._unique_configurations(kind)
+        low, high = [], []
+        for param in params:
+            if param in self.only_pairwise:
+                low.append(lower[param] or 0)
+                high.append(lower[param] if weighted and lower[param] is not None else min(total, unique))
+                continue
+            ratio_low, ratio_high = self._ratio_bounds(param)
+            low.append(max(lower[param], math.ceil(ratio_low * total - 1e-9)))
+            high.append(min(math.floor(ratio_high * total + 1e-9), unique))
+        if any(count_low > count_high for count_low, count_high in zip(low, high)):
+            return None
+        if sum(low) > total or sum(high) < total:
+            return None
+        return low, high
+
+    def _unique_configurations(self, kind):
+        """
+        :param kind:
+        :return: Number of unique configurations containing parameter of kind, which is number of combinations
+        of parameters of other kinds
+        """
+        return math.prod(len(params) for params in self.model.kind_params) // len(self.model.kind_params[kind])
+
+    def _kind_quotas(self, kind, total, low, high):
+        """
+        :param kind:
+        :param total: Number of configurations of suite
+        :param low: Lowest count of each parameter of kind
+        :param high: Highest count of each parameter of kind
+        :return: Count of configurations of suite containing each parameter of kind meeting ratio requirements,
+        the cheapest parameters and then parameters below their expected ratio get remaining configurations first,
+        parameters tested only pairwise are not added unless all parameters of kind are tested only pairwise,
+        None if there are no such counts
+        """
+        params = self.model.kind_params[kind]
+        counts = list(low)
+        remaining = total - sum(counts)
+        preference = [(param not in self.only_pairwise, -self.costs[param]) for param in params]
+        for group in sorted(set(preference), reverse=True):
+            indexes = [index for index, key in enumerate(preference) if key == group]
+            capacity = sum(high[index] - counts[index] for index in indexes)
+            if capacity <= remaining:
+                for index in indexes:
+                    counts[index] = high[index]
+                remaining -= capacity
+                continue
+            levelled = self._level_counts(
+                [self.parameters_ratio[params[index]] * total for index in indexes],
+                [counts[index] for index in indexes],
+                [high[index] for index in indexes],
+                remaining,
+            )
+            for index, count in zip(indexes, levelled):
+                counts[index] = count
+            break
+        for param, count in zip(params, counts):
+            if param not in self.only_pairwise and not self._meets_margin(self._divergence(param, count / total)):
+                return None
+        return counts
+
+    @staticmethod
+    def _level_counts(expected, low, high, remaining):
+        """
+        Hand out remaining configurations at once, every parameter is filled up to the same distance below its
+        expected count, which is found by bisection, and configurations left by rounding go to parameters
+        with the largest remainders
+        :param expected: Expected count of each parameter
+        :param low: Current count of each parameter
+        :param high: Highest count of each parameter
+        :param remaining: Number of configurations to hand out, less than parameters can get
+        :return: Count of each parameter
+        """
+        target = sum(low) + remaining
+
+        def filled(level):
+            return [
+                min(max(count - level, count_low), count_high)
+                for count, count_low, count_high in zip(expected, low, high)
+            ]
+
+        below = min(count - count_high for count, count_high in zip(expected, high))
+        above = max(count - count_low for count, count_low in zip(expected, low))
+        for _ in range(64):
+            middle = (below + above) / 2
+            if sum(filled(middle)) > target:
+                below = middle
+            else:
+                above = middle
+        levels = filled(above)
+        counts = [math.floor(level) for level in levels]
+        order = sorted(range(len(counts)), key=lambda index: counts[index] - levels[index])
+        for index in [index for index in order if counts[index] < high[index]][: target - sum(counts)]:
+            counts[index] += 1
+        return counts
+
+    def _quota_range(self, lower, start):
+        """
+        :param lower: Minimal count of each parameter
+        :param start: Minimal number of configurations of suite
+        :return: Numbers of configurations of suite which are searched for quotas, each parameter keeps its minimal
+        count within its highest ratio and fits into unique configurations containing it within its lowest ratio,
+        suite can't have more configurations than there are unique ones
+        """
+        first = max([start] + [sum(lower[param] or 0 for param in params) for params in self.model.kind_params])
+        limit = QUOTA_SEARCH_FACTOR * start
+        for param in range(len(self.model)):
+            if param not in self.only_pairwise and self.margin:
+                ratio_low, ratio_high = self._ratio_bounds(param)
+                first = max(first, math.ceil(lower[param] / ratio_high - 1e-9))
+                # Each parameter fits into its bounds once they are more than one configuration apart
+                limit = max(limit, 2 * math.ceil(max(lower[param] / ratio_high, 1 / (ratio_high - ratio_low))))
+        limit = min(limit, math.prod(len(params) for params in self.model.kind_params))
+        for kind, params in enumerate(self.model.kind_params):
+            for param in params:
+                if param not in self.only_pairwise and (ratio_low := self._ratio_bounds(param)[0]):
+                    limit = min(limit, math.floor(self._unique_configurations(kind) / ratio_low + 1e-9))
+        return range(first, limit + 1)
+
+    def _quotas(self, lower, start):
+        """
+        :param lower: Minimal count of each parameter, e.g. its current quantity
+        :param start: Minimal number of configurations of suite
+        :return: Count of configurations containing each parameter in the smallest suite meeting ratio
+        requirements, None if there is no such suite
+        """
+        for total in self._quota_range(lower, start):
+            bounds = []
+            for kind in range(len(self.model.kinds)):
+                if (kind_bounds := self._kind_bounds(kind, total, lower)) is None:
+                    break
+                bounds.append(kind_bounds)
+            else:
+                quotas = []
+                for kind, (low, high) in enumerate(bounds):
+                    if (counts := self._kind_quotas(kind, total, low, high)) is None:
+                        break
+                    quotas.extend(counts)
+                else:
+                    return quotas
         return None
 
+    def _balance(self):
+        """
+        Add configurations filling quotas of the smallest suite meeting ratio requirements, parameters breaking
+        ratio requirements are stored in unmet_weights when there is no such suite or balancing stalls
+        :return: Generator of added configurations as dictionaries of kinds and values
+        """
+        quotas = None if self._stalled() else self._quotas(self.quantity, len(self.rows) + 1)
+        if quotas is None:
+            self.unmet_weights = sorted(self.violations(self.quantity, len(self.rows)))
+            return
+        deficit = [quota - quantity for quota, quantity in zip(quotas, self.quantity)]
+        rows = []
+        seen = set()
+        for _ in range(sum(deficit[param] for param in self.model.kind_params[0])):
+            if self._budget_spent(len(rows)):
+                break
+            configuration = self._quota_configuration(quotas, deficit, seen, rows)
+            if configuration is None:
+                break
+            rows.append(configuration)
+            seen.add(configuration)
+            for param in configuration:
+                deficit[param] -= 1
+        for configuration in rows:
+            self._append_configuration(configuration)
+            yield self.model.decode(configuration)
+
+    def _stalled(self):
+        """
+        :return: True if balanced suites stopped getting closer to ratio requirements, False otherwise
+        """
+        if (divergence := self.max_divergence()) < self._closest[0] * (1 - BALANCE_PROGRESS):
+            self._closest = (divergence, len(self.rows))
+        return len(self.rows) >= BALANCE_GROWTH * self._closest[1]
+
+    def _quota_configuration(self, quotas, deficit, seen, rows):
+        """
+        :param quotas: Count of configurations containing each parameter in balanced suite
+        :param deficit: Number of configurations each parameter is missing to its quota
+        :param seen: Configurations which are going to be added
+        :param rows: Configurations which are going to be added, they may be changed by swapping parameters
+        :return: Unique configuration allowed by constraints made of parameters missing the most to their quotas,
+        parameters which already met their quotas are used only when there is no other unique configuration
+        and the ones which would diverge the least from their ratio are preferred, None if there is no unique
+        configuration at all
+        """
+        tie_breaks = self._tie_breaks(len(self.model))
+        columns = [
+            sorted(params, key=lambda param: (-deficit[param], tie_breaks[param])) for params in self.model.kind_params
+        ]
+        missing = [[param for param in column if deficit[param] > 0] for column in columns]
+        for configuration in self.constraints.product(missing, lambda param: -deficit[param]):
+            if self._is_new(configuration, seen):
+                return configuration
+        if all(missing) and (
+            configuration := self._swap_configuration(tuple(column[0] for column in missing), seen, rows)
+        ):
+            return configuration
+        total = sum(quotas[param] for param in self.model.kind_params[0])
+        for configuration in self.constraints.product(
+            columns, lambda param: self._divergence(param, (quotas[param] - deficit[param] + 1) / total)
+        ):
+            if self._is_new(configuration, seen):
+                return configuration
+        return None
+
+    def _swap_configuration(self, configuration, seen, rows):
+        """
+        Make configuration unique by swapping parameter of one kind with configuration which is going to be added,
+        swap keeps number of configurations containing each parameter
+        :param configuration: Configuration which is repeated or not allowed by constraints
+        :param seen: Configurations which are going to be added
+        :param rows: Configurations which are going to be added, swapped one is replaced in place
+        :return: Unique configuration allowed by constraints, None if no swap makes it
+        """
+        for index, row in enumerate(rows):
+            for kind, param in enumerate(configuration):
+                if row[kind] == param:
+                    continue
+                swapped = configuration[:kind] + (row[kind],) + configuration[kind + 1 :]
+                other = row[:kind] + (param,) + row[kind + 1 :]
+                if (
+                    self._is_new(swapped, seen)
+                    and self._is_new(other, seen)
+                    and swapped != other
+                    and self.constraints.allows(swapped)
+                    and self.constraints.allows(other)
+                ):
+                    seen.discard(row)
+                    seen.add(other)
+                    rows[index] = other
+                    return swapped
+        return None
+
+    def _is_new(self, configuration, seen):
+        """
+        :param configuration: Configuration as tuple of parameter ids
+        :param seen: Configurations which are going to be added
+        :return: True if configuration is neither generated nor going to be added, False otherwise
+        """
+        return configuration not in seen and configuration not in self.rows
+
     def _add_triplet(self, param, configuration, sorted_params):
         """
         Add (A,B,C) triplet of parameters to final configuration based on logic that
@@ -334,57 +924,45 @@ class Pairwise:
         :param sorted_params: List of parameters sorted by quantity
         :return: True if 2 other params were added to configuration, False otherwise.
         """
+        kind_of = self.model.kind_of
         for second_param in sorted_params:
             if (
                 second_param != param
-                and not configuration.get(self._get_kind(second_param))
-                and {param, second_param} in self.pairs
+                and configuration[kind_of[second_param]] is None
+                and (param, second_param) in self.pairs
             ):
                 third_param = self._find_triplet(param, second_param, configuration)
                 if third_param is None:
                     continue
-                configuration[self._get_kind(second_param)] = second_param
-                configuration[self._get_kind(third_param)] = third_param
+                configuration[kind_of[second_param]] = second_param
+                configuration[kind_of[third_param]] = third_param
                 return True
         return False
 
     def _find_triplet(self, param, second_param, configuration):
         """
         Find (A,B,C) triplet of parameters to final configuration based on logic that
-        (A,B), (B,C) and (A,C) pairs are in remaining pairs
+        (A,B), (B,C) and (A,C) pairs are in remaining pairs, C is found as common uncovered partner
+        of B and all parameters already in configuration
         :param param:
         :param second_param:
         :param configuration: Generated configuration
         :return: 2 parameters to be added to generated configurations if they meet requirements, None otherwise
         """
-        for remaining_param in self.pairs:
-            if param in remaining_param:
-                copy = remaining_param.copy()
-                copy.remove(param)
-                third_param = copy.pop()
-                if (
-                    {third_param, second_param} in self.pairs
-                    and {
-                        third_param,
-                        param,
-                    }
-                    in self.pairs
-                    and not configuration.get(self._get_kind(third_param))
-                ):
-                    add = True
-                    for value in configuration.values():
-                        if value and (
-                            {value, second_param} not in self.pairs
-                            or {
-                                value,
-                                third_param,
-                            }
-                            not in self.pairs
-                        ):
-                            add = False
-                            break
-                    if add:
-                        return third_param
+        kind_of = self.model.kind_of
+        filled = [value for value in configuration if value is not None and value != param]
+        if any((value, second_param) not in self.pairs for value in filled):
+            return None
+        neighbours = [self.pairs.partners(value) for value in [param, second_param] + filled]
+        smallest = min(neighbours, key=len)
+        thirds = [
+            third
+            for third in smallest
+            if configuration[kind_of[third]] is None and all(third in partners for partners in neighbours)
+        ]
+        for third_param in sorted(thirds):
+            if self._fits(configuration, second_param, third_param):
+                return third_param
         return None
 
     def _add_transitive_triplet(self, configuration, param, sorted_params):
@@ -396,86 +974,57 @@ class Pairwise:
         :param sorted_params: List of parameters sorted by quantity
         :return: True if 2 other params were added to configuration, False otherwise.
         """
+        kind_of = self.model.kind_of
         for sorted_param in sorted_params:
             if sorted_param != param and (
-                not configuration.get(self._get_kind(sorted_param)) and {param, sorted_param} in self.pairs
+                configuration[kind_of[sorted_param]] is None and (param, sorted_param) in self.pairs
             ):
-                remaining_pairs = self.pairs.copy()
-                remaining_pairs.remove({param, sorted_param})
-                for remaining_param in remaining_pairs:
-                    # A being the main param this part looks for (A,B) and (A,C)
-                    if param in remaining_param:
-                        copy = remaining_param.copy()
-                        copy.remove(param)
-                        second_param = copy.pop()
-                        if self._check_transitive_triplet(param, sorted_param, second_param, configuration):
-                            return True
-                        continue
-                    # A being the main param this part looks for (A,B) and (B,C)
-                    if sorted_param in remaining_param:
-                        copy = remaining_param.copy()
-                        copy.remove(sorted_param)
-                        second_param = copy.pop()
-                        if self._check_transitive_triplet(param, sorted_param, second_param, configuration):
-                            return True
-                        continue
+                # A being the main param, C is uncovered partner of A or B in unfilled kind,
+                # candidates are tried in order of their (A,C) or (B,C) pairs
+                candidates = [
+                    (self.pairs.order_key(node, second_param), second_param)
+                    for node in (param, sorted_param)
+                    for second_param in self.pairs.partners(node)
+                    if configuration[kind_of[second_param]] is None and kind_of[second_param] != kind_of[sorted_param]
+                ]
+                candidates.sort()
+                for _, second_param in candidates:
+                    if self._check_transitive_triplet(sorted_param, second_param, configuration):
+                        return True
         return False
 
-    def _check_transitive_triplet(self, param, sorted_param, second_param, configuration):
+    def _check_transitive_triplet(self, sorted_param, second_param, configuration):
         """
         Checks transitive triplet and add it to final configuration
-        :param param:
         :param sorted_param:
         :param second_param:
         :param configuration: Generated configuration
         :return: True if 2 other params were added to configuration, False otherwise
         """
-        if (
-            self._get_kind(param) == self._get_kind(sorted_param)
-            or self._get_kind(param) == self._get_kind(second_param)
-            or self._get_kind(sorted_param) == self._get_kind(second_param)
-        ):
+        if not self._fits(configuration, sorted_param, second_param):
             return False
-        if {second_param, sorted_param} in self.pairs or {
-            second_param,
-            param,
-        } in self.pairs:
-            if not configuration.get(self._get_kind(second_param)):
-                configuration[self._get_kind(sorted_param)] = sorted_param
-                configuration[self._get_kind(second_param)] = second_param
-                return True
-        return False
-
-    def _add_any_triplet(self, configuration, param, sorted_params):
-        """
-        Parameter A being the main parameter this function add (B,C,D) triplet of parameters to final
-        configuration based on logic that (B,C), (C,D) and (B,D) pairs are in remaining pairs
-        :param configuration: Generated configuration
-        :param param:
-        :param sorted_params: List of parameters sorted by quantity
-        :return: True if 2 other params were added to configuration, False otherwise.
-        """
-        for sorted_param in sorted_params:
-            if sorted_param != param:
-                if result := self._add_triplet(param, configuration, sorted_params):
-                    configuration[self._get_kind(sorted_param)] = sorted_param
-                    return result
-        return None
+        kind_of = self.model.kind_of
+        configuration[kind_of[sorted_param]] = sorted_param
+        configuration[kind_of[second_param]] = second_param
+        return True
 
-    def _param_in_pair(self, sorted_params, pairs, position):
+    def _param_in_pair(self, sorted_params, pairs, position, configuration):
         """
          A being the main parameter this function returns parameter B based
          on logic that (A,B) pair is in remaining pairs
         :param sorted_params: List of parameters sorted by quantity
-        :param pairs: List of uncovered pairs
+        :param pairs: Store of uncovered pairs
         :param position: Position at which the parameter should be
+        :param configuration: Generated configuration
         :return: Parameter, if any parameter meets the requirements, None otherwise
         """
         for sorted_param in sorted_params:
-            if self._get_kind(sorted_param) == position:
-                for unused_pair in pairs:
-                    if sorted_param in unused_pair:
-                        return sorted_param
+            if (
+                self.model.kind_of[sorted_param] == position
+                and pairs.degree(sorted_param)
+                and self._fits(configuration, sorted_param)
+            ):
+                return sorted_param
         return None
 
     def _alter_configuration(self, configuration):
@@ -488,10 +1037,10 @@ class Pairwise:
         for param in kld:
             if param in self.only_pairwise and self._check_finished_param(param):
                 continue
-            position = self._get_kind(param)
-            tmp_conf = configuration.copy()
-            tmp_conf[position] = param
-            if tmp_conf not in self.configurations:
+            tmp_conf = list(configuration)
+            tmp_conf[self.model.kind_of[param]] = param
+            tmp_conf = tuple(tmp_conf)
+            if tmp_conf not in self.rows and self.constraints.allows(tmp_conf):
                 return tmp_conf
         return None
 
@@ -501,36 +1050,30 @@ class Pairwise:
         :param parameter: Main parameter from which configuration will be generated
         :return Generated configuration
         """
-
-        def get_priority(configuration, kld):
-            """
-            :param configuration: Generated configuration
-            :param kld: list of KL divergences for each parameter
-            :return: Priority for given configuration
-            """
-            priority = 0
-            for parameter in configuration:
-                priority += kld[parameter]
-            return priority
-
-        position = self._get_kind(parameter)
+        finished = {param for param in self.only_pairwise if self._check_finished_param(param)}
+        if parameter in finished:
+            return None
+        position = self.model.kind_of[parameter]
+        main_only = [None] * len(self.model.kinds)
+        main_only[position] = parameter
         product_params = [[parameter]]
-        for kind, params in self.parameters.items():
+        for kind, params in enumerate(self.model.kind_params):
             if kind != position:
-                product_params.append(params)
+                product_params.append(
+                    [
+                        param
+                        for param in params
+                        if param not in finished and self.constraints.compatible(param, main_only)
+                    ]
+                )
 
-        product = list(itertools.product(*product_params))
+        # Priority of configuration is sum of KL divergences of its parameters
         kld = self._kl_divergence()
-        product.sort(key=lambda x: get_priority(x, kld))
-
-        for conf in product:
-            conf_dict = {}
+        for conf in best_first_product(product_params, kld.__getitem__):
+            row = [None] * len(self.model.kinds)
             for param in conf:
-                conf_dict[self._get_kind(param)] = param
-            can_add = True
-            for param in self.only_pairwise:
-                if self._check_finished_param(param) and param in conf:
-                    can_add = False
-                    break
-            if conf_dict not in self.configurations and can_add:
-                return conf_dict
+                row[self.model.kind_of[param]] = param
+            row = tuple(row)
+            if row not in self.rows and self.constraints.allows(row):
+                return row
+        return None
@@ -1,23 +1,40 @@
 """Parameters check class for pairwise tool"""
 import json
+import math
 
 
 class ParametersCheck:
     """Parameters check class"""
 
-    def __init__(self, input_file):
+    def __init__(self, input_file=None):
         self.weights = None
+        self.costs = None
         self.parameters = None
+        self.constraints = None
         self.file = None
         self.input_file = input_file
 
     def check_parameters(self):
         """Checks if input paramateres are correct"""
         self.try_load()
+        self._check_loaded()
+
+    def check_model(self, parameters):
+        """
+        Checks if already loaded parameters are correct
+        :param parameters: Parameters in the same format as loaded input file
+        """
+        self.load(parameters)
+        self._check_loaded()
+
+    def _check_loaded(self):
+        """Checks loaded parameters, weights and constraints"""
         self._check_empty_kind()
         self._check_duplicate_parameter()
         self._check_nonexistent_weight()
         self._check_negative_weight()
+        self._check_costs()
+        self._check_constraints()
 
     def try_load(self):
         """Try to load input json file"""
@@ -25,9 +42,34 @@ class ParametersCheck:
             self.file = json.load(self.input_file)
         except Exception as e:
             raise InvalidJSON("\nGiven JSON file is invalid.") from e
-
+        self.load(self.file)
+
+    def load(self, parameters):
+        """
+        :param parameters: Parameters in the same format as loaded input file
+        """
+        if not isinstance(parameters, dict) or "Parameters" not in parameters:
+            raise InvalidJSON("\nParameters are missing.")
+        self.file = parameters
         self.parameters = self.file["Parameters"]
         self.weights = self.file.get("Weights", {})
+        self.costs = self.file.get("Costs", {})
+        self.constraints = self.file.get("Constraints", [])
+        self._check_structure()
+
+    def _check_structure(self):
+        """Checks if parameters are object of lists of values, and weights and costs are objects"""
+        if not isinstance(self.parameters, dict) or not all(
+            isinstance(params, list) for params in self.parameters.values()
+        ):
+            raise InvalidJSON("\nParameters have to be object of lists of parameters of each kind.")
+        for kind, params in self.parameters.items():
+            if any(isinstance(value, (dict, list)) for value in params):
+                raise InvalidJSON(f"\nParameters of {kind} have to be strings, numbers, booleans or null.")
+        if not isinstance(self.weights, dict):
+            raise InvalidWeight("\nWeights have to be object of parameters and their weights.")
+        if not isinstance(self.costs, dict):
+            raise InvalidCost("\nCosts have to be object of parameters and their costs.")
 
     def _check_empty_kind(self):
         """Checks if any parameters list is empty"""
@@ -36,22 +78,21 @@ class ParametersCheck:
                 raise EmptyList(f"\nList of parameters for {kind} is empty.")
 
     def _check_duplicate_parameter(self):
-        """Checks if any parameter is present more tha once"""
-        seen = set()
-        duplicates = set()
-        lst = []
-        for params in self.parameters.values():
-            lst.extend(params)
-        for item in lst:
-            if item in seen:
-                duplicates.add(item)
-            seen.add(item)
-
-        if len(duplicates) != 0:
-            raise DuplicateParameter(
-                f"\nParameters {list(duplicates)} are present more than once."
-                f"\nPlease use unique name for each parameter."
-            )
+        """Checks if any parameter is present more than once in one kind"""
+        for kind, params in self.parameters.items():
+            seen = set()
+            duplicates = []
+            for item in params:
+                key = (type(item), item)
+                if key in seen and item not in duplicates:
+                    duplicates.append(item)
+                seen.add(key)
+
+            if len(duplicates) != 0:
+                raise DuplicateParameter(
+                    f"\nParameters {duplicates} are present more than once in {kind}."
+                    f"\nPlease use unique name for each parameter of one kind."
+                )
 
     def _check_nonexistent_weight(self):
         """Checks if there is weight set for nonexistent parameter"""
@@ -63,23 +104,87 @@ class ParametersCheck:
                 raise InvalidWeight(f"Parameter '{weight}' doesn't exists.")
 
     def _check_negative_weight(self):
-        """Checks if there is negative weight set for any parameter"""
+        """Checks if there is negative, non-numeric or infinite weight set for any parameter"""
         for k, v in self.weights.items():
+            if not isinstance(v, (int, float)) or isinstance(v, bool) or not math.isfinite(v):
+                raise InvalidWeight(f"Weight for parameter '{k}' has to be number.")
             if v < 0:
                 raise InvalidWeight(f"Weight for parameter '{k}' is negative.")
-
-
-class EmptyList(Exception):
+        for kind, params in self.parameters.items():
+            if not math.isfinite(sum(self.weights.get(param) or 1 for param in params)):
+                raise InvalidWeight(f"Weights of parameters of {kind} are too large.")
+
+    def _check_costs(self):
+        """Checks if costs are set for existing parameters and are non-negative numbers"""
+        values = {(type(value), value) for params in self.parameters.values() for value in params}
+        for value, cost in self.costs.items():
+            if (type(value), value) not in values:
+                raise InvalidCost(f"Cost is set for parameter '{value}' which doesn't exist.")
+            if not isinstance(cost, (int, float)) or isinstance(cost, bool) or not 0 <= cost < math.inf:
+                raise InvalidCost(f"Cost for parameter '{value}' has to be non-negative number.")
+
+    def _check_constraints(self):
+        """Checks if constraints are list of combinations of existing parameters"""
+        if not isinstance(self.constraints, list):
+            raise InvalidConstraint("\nConstraints have to be list of objects.")
+        for constraint in self.constraints:
+            if not isinstance(constraint, dict) or not constraint:
+                raise InvalidConstraint(f"\nConstraint {constraint} has to be non-empty object.")
+            if set(constraint) == {"if", "then"}:
+                parts = [constraint["if"], constraint["then"]]
+            elif "if" in constraint or "then" in constraint:
+                raise InvalidConstraint(f"\nConstraint {constraint} has to contain only 'if' and 'then'.")
+            else:
+                parts = [constraint]
+            for part in parts:
+                if not isinstance(part, dict) or not part:
+                    raise InvalidConstraint(f"\nConstraint {constraint} has to contain non-empty objects.")
+                self._check_constraint_values(constraint, part)
+
+    def _check_constraint_values(self, constraint, part):
+        """
+        Checks if constraint uses existing parameters
+        :param constraint: Checked constraint
+        :param part: Part of constraint with kinds and their values
+        """
+        for kind, values in part.items():
+            if kind not in self.parameters:
+                raise InvalidConstraint(f"\nConstraint {constraint} uses nonexistent parameter kind '{kind}'.")
+            existing = {(type(item), item) for item in self.parameters[kind]}
+            for value in values if isinstance(values, list) else [values]:
+                if isinstance(value, (dict, list)):
+                    raise InvalidConstraint(
+                        f"\nConstraint {constraint} has to contain parameter or list of parameters of {kind}."
+                    )
+                if (type(value), value) not in existing:
+                    raise InvalidConstraint(
+                        f"\nConstraint {constraint} uses parameter '{value}' which doesn't exist in {kind}."
+                    )
+
+
+class ParametersError(Exception):
+    """Base exception class for invalid parameters"""
+
+
+class EmptyList(ParametersError):
     """Exception class for empty parameters list"""
 
 
-class DuplicateParameter(Exception):
+class DuplicateParameter(ParametersError):
     """Exception class for duplicate parameter"""
 
 
-class InvalidJSON(Exception):
+class InvalidJSON(ParametersError):
     """Exception class for invalid JSON file"""
 
 
-class InvalidWeight(Exception):
+class InvalidWeight(ParametersError):
     """Exception class for invalid parameter weight"""
+
+
+class InvalidCost(ParametersError):
+    """Exception class for invalid parameter cost"""
+
+
+class InvalidConstraint(ParametersError):
+    """Exception class for invalid constraint"""
@@ -0,0 +1,89 @@
+"""Parameters model class for pairwise tool"""
+
+
+# pylint: disable=too-many-instance-attributes
+class ParametersModel:
+    """
+    Parameters compiled into integer ids. Parameters are numbered kind by kind in the order
+    in which they are given, so every parameter id maps to its kind and value in constant time.
+    """
+
+    def __init__(self, parameters):
+        """
+        :param parameters: Loaded input file with parameters and optional weights and costs
+        """
+        weights = parameters.get("Weights", {})
+        costs = parameters.get("Costs", {})
+        self.kinds = list(parameters["Parameters"])
+        self.values = []
+        self.kind_of = []
+        self.kind_params = []
+        for kind, values in enumerate(parameters["Parameters"].values()):
+            start = len(self.values)
+            self.values.extend(values)
+            self.kind_of.extend([kind] * len(values))
+            self.kind_params.append(range(start, len(self.values)))
+        self.weights = [weights.get(value) for value in self.values]
+        # Values without cost cost nothing, so cost of configuration is sum of costs of its expensive values
+        self.costs = [costs.get(value, 0) for value in self.values]
+        self._ambiguous = self._ambiguous_values()
+        self._lookup = None
+
+    def __len__(self):
+        return len(self.values)
+
+    def _ambiguous_values(self):
+        """
+        :return: Indexes of values which are present in more than one kind
+        """
+        seen = {}
+        ambiguous = set()
+        for param, value in enumerate(self.values):
+            key = (type(value), value)
+            if key in seen:
+                ambiguous.update((seen[key], param))
+            seen[key] = param
+        return ambiguous
+
+    def label(self, param):
+        """
+        :param param: Parameter id
+        :return: Value of parameter, prefixed with its kind when the value is present in more kinds
+        """
+        if param in self._ambiguous:
+            return f"{self.kinds[self.kind_of[param]]}={self.values[param]}"
+        return self.values[param]
+
+    def label_combination(self, combination):
+        """
+        :param combination: Parameter ids
+        :return: Combination as string of labels of its parameters
+        """
+        return f"({', '.join(str(self.label(param)) for param in combination)})"
+
+    def encode(self, configuration):
+        """
+        :param configuration: Configuration as dictionary of kinds and values, values are matched
+        by their string representation, so configurations loaded from CSV can be encoded
+        :return: Configuration as tuple of parameter ids in kind order, None for missing or unknown values
+        """
+        if self._lookup is None:
+            self._lookup = [{str(self.values[param]): param for param in params} for params in self.kind_params]
+        return tuple(
+            lookup.get(str(configuration[kind])) if kind in configuration else None
+            for kind, lookup in zip(self.kinds, self._lookup)
+        )
+
+    def decode(self, row):
+        """
+        :param row: Configuration as tuple of parameter ids in kind order
+        :return: Configuration as dictionary of kinds and values
+        """
+        return {kind: self.values[param] for kind, param in zip(self.kinds, row)}
+
+    def cost(self, configuration):
+        """
+        :param configuration: Configuration as dictionary of kinds and values
+        :return: Summed cost of values of configuration
+        """
+        return sum(self.costs[param] for param in self.encode(configuration) if param is not None)
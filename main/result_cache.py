@@ -0,0 +1,138 @@
+"""Result cache for pairwise tool"""
+import functools
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import warnings
+
+
+def default_cache_dir():
+    """
+    :return: Default directory of cached results
+    """
+    return os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "pairwise")
+
+
+@functools.lru_cache(maxsize=None)
+def source_version():
+    """
+    :return: Hash of source code of pairwise tool, so results of changed generator are never loaded
+    """
+    digest = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "*.py"))):
+        with open(path, "rb") as source:
+            digest.update(source.read())
+    return digest.hexdigest()
+
+
+def canonical(value):
+    """
+    :param value: Value loaded from JSON or given by library
+    :return: Value with objects replaced by lists of their items sorted by key, so order of keys doesn't change
+    hash, keys of any type are sorted by their representation
+    """
+    if isinstance(value, dict):
+        return sorted([repr(key), canonical(item)] for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return [canonical(item) for item in value]
+    return value
+
+
+class ResultCache:
+    """
+    Content-addressed cache of generated configurations. Results are stored as JSON files named by hash
+    of normalised input, they are written atomically and the least recently used ones are evicted
+    once size of cache exceeds its limit.
+    """
+
+    def __init__(self, directory, max_size):
+        """
+        :param directory: Directory of cached results
+        :param max_size: Maximal size of cached results in bytes
+        """
+        self.directory = directory
+        self.max_size = max_size
+
+    @staticmethod
+    def key(parameters, **options):
+        """
+        :param parameters: Loaded input file with parameters and optional weights
+        :param options: Options which affect generated configurations
+        :return: Hash of parameters in their order, constraints in any order, other sections of input file
+        with keys in any order, options and version of generator
+        """
+        constraints = [canonical(constraint) for constraint in parameters.get("Constraints", [])]
+        key = {
+            "Parameters": list(parameters["Parameters"].items()),
+            "Constraints": sorted(constraints, key=lambda constraint: json.dumps(constraint, default=str)),
+            "Sections": {
+                name: canonical(section)
+                for name, section in parameters.items()
+                if name not in ("Parameters", "Constraints")
+            },
+            "Options": canonical(options),
+            "Version": source_version(),
+        }
+        return hashlib.sha256(json.dumps(key, separators=(",", ":"), sort_keys=True, default=str).encode()).hexdigest()
+
+    def _path(self, key):
+        """
+        :param key: Hash of input
+        :return: Path of cached result
+        """
+        return os.path.join(self.directory, f"{key}.json")
+
+    def load(self, key):
+        """
+        :param key: Hash of input
+        :return: Cached result, None if there is no valid result for given key
+        """
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as cached:
+                result = json.load(cached)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return result
+
+    def store(self, key, result):
+        """
+        Store result atomically and evict least recently used results
+        :param key: Hash of input
+        :param result: Result which can be serialized to JSON
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(descriptor, "w", encoding="utf-8") as cached:
+                    json.dump(result, cached, separators=(",", ":"))
+                os.replace(temporary, self._path(key))
+            except BaseException:
+                os.remove(temporary)
+                raise
+            self._evict()
+        except OSError as e:
+            warnings.warn(f"Result could not be stored in cache: {e}")
+
+    def _evict(self):
+        """Remove least recently used results until size of cache is within its limit"""
+        entries = []
+        for path in glob.glob(os.path.join(self.directory, "*.json")):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        size = sum(entry[1] for entry in entries)
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            size -= entry_size
@@ -0,0 +1,231 @@
+"""Local generation service of pairwise tool"""
+import asyncio
+import json
+import math
+import os
+import signal
+import socket
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import click
+
+from .api import InvalidOption, generate_with_warnings, get_engine
+from .compiled_parameters import CompiledParameters
+from .parameters_check import ParametersCheck, ParametersError
+from .result_cache import ResultCache
+
+# Options of request and their defaults
+OPTIONS = {"margin": None, "engine": "python", "strength": 2}
+# Maximal length of one request line in bytes
+REQUEST_LIMIT = 2**26
+# Maximal number of compiled parameters kept by each generating process
+COMPILED_LIMIT = 16
+# Compiled parameters of the process keyed by hash of parameters, least recently used ones are dropped
+COMPILED: OrderedDict[str, CompiledParameters] = OrderedDict()
+
+
+def default_socket():
+    """
+    :return: Default path of Unix socket of server
+    """
+    return os.path.join(os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir(), f"pairwise-{os.getuid()}.sock")
+
+
+class GenerationServer:
+    """
+    Server answering generation requests, each request and response is one line of JSON. Results are kept
+    in memory keyed by the same hash as result cache, identical requests arriving while their result
+    is generated wait for the same generation, and generation runs in process pool, so event loop
+    keeps accepting requests.
+    """
+
+    def __init__(self, executor, max_cached):
+        """
+        :param executor: Process pool running generation
+        :param max_cached: Maximal number of results kept in memory, least recently used ones are dropped
+        """
+        self.executor = executor
+        self.max_cached = max_cached
+        self.results = OrderedDict()
+        self.pending = {}
+
+    async def handle(self, reader, writer):
+        """
+        Answer requests of one connection until client closes it
+        :param reader: Stream of requests
+        :param writer: Stream of responses
+        """
+        try:
+            while line := await reader.readline():
+                try:
+                    response = await self.respond(line)
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    # Unexpected failure of one request doesn't close connection without response
+                    response = {"error": str(e).strip() or type(e).__name__}
+                writer.write(json.dumps(response, separators=(",", ":")).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            # Client disconnected or sent line longer than limit
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, line):
+        """
+        :param line: Request, JSON object with parameters in the same format as input file and options
+        :return: Response with configurations as lists of values and warnings, or error
+        """
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict) or "parameters" not in request:
+                raise InvalidOption("Request has to be object with parameters.")
+            parameters = request["parameters"]
+            options = {name: request.get(name, default) for name, default in OPTIONS.items()}
+            check_options(options)
+            ParametersCheck().check_model(parameters)
+            get_engine(options["engine"], options["strength"], len(parameters["Parameters"]))
+        except (ValueError, TypeError, ParametersError, InvalidOption) as e:
+            return {"error": str(e).strip()}
+
+        key = ResultCache.key(parameters, **options)
+        if key in self.results:
+            self.results.move_to_end(key)
+            return self.results[key]
+        if key not in self.pending:
+            self.pending[key] = asyncio.ensure_future(self._generate(key, parameters, options))
+        # Generation continues for other waiting requests when this client disconnects
+        return await asyncio.shield(self.pending[key])
+
+    async def _generate(self, key, parameters, options):
+        """
+        :param key: Hash of request
+        :param parameters: Checked parameters
+        :param options: Options of generation
+        :return: Response with configurations as lists of values and warnings, or error
+        """
+        try:
+            loop = asyncio.get_running_loop()
+            try:
+                rows, messages = await loop.run_in_executor(self.executor, generate_rows, parameters, options)
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                # Failed generation is answered to waiting requests but not kept, so the next request tries again
+                return {"error": f"Generation failed: {str(e).strip() or type(e).__name__}"}
+            response = {"configurations": rows, "warnings": messages}
+            self.results[key] = response
+            if len(self.results) > self.max_cached:
+                self.results.popitem(last=False)
+            return response
+        finally:
+            del self.pending[key]
+
+
+def check_options(options):
+    """
+    Check types of options of request, command line options are checked by click instead
+    :param options: Options of request
+    :raises InvalidOption: If margin isn't non-negative number or strength isn't integer at least 2
+    """
+    margin = options["margin"]
+    if margin is not None and (
+        isinstance(margin, bool) or not isinstance(margin, (int, float)) or not 0 <= margin < math.inf
+    ):
+        raise InvalidOption(f"Margin has to be non-negative number, not {json.dumps(margin)}.")
+    strength = options["strength"]
+    if isinstance(strength, bool) or not isinstance(strength, int) or strength < 2:
+        raise InvalidOption(f"Strength has to be integer at least 2, not {json.dumps(strength)}.")
+    if not isinstance(options["engine"], str):
+        raise InvalidOption(f"Engine has to be string, not {json.dumps(options['engine'])}.")
+
+
+def generate_rows(parameters, options):
+    """
+    :param parameters: Checked parameters
+    :param options: Options of generation
+    :return: Configurations as lists of values in kind order and messages of warnings
+    """
+    # Requests of the same parameters with other options don't compile model, constraints and impossible pairs again
+    key = ResultCache.key(parameters)
+    compiled = COMPILED.pop(key, None) or CompiledParameters(parameters)
+    COMPILED[key] = compiled
+    if len(COMPILED) > COMPILED_LIMIT:
+        COMPILED.popitem(last=False)
+    configurations, messages = generate_with_warnings(parameters, compiled=compiled, **options)
+    return [list(configuration.values()) for configuration in configurations], messages
+
+
+@click.command()
+@click.option(
+    "--socket",
+    "socket_path",
+    help="Path of Unix socket, default is pairwise-UID.sock in runtime or temporary directory",
+    type=click.Path(dir_okay=False),
+    envvar="PAIRWISE_SOCKET",
+    default=default_socket,
+)
+@click.option("--port", help="Listen on TCP port of localhost instead of Unix socket", type=click.IntRange(0, 65535))
+@click.option(
+    "--jobs",
+    help="Number of processes generating configurations, default is number of CPUs",
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--max-cached",
+    help="Maximal number of results kept in memory, default is 256",
+    type=click.IntRange(min=0),
+    default=256,
+)
+def serve(socket_path, port, jobs, max_cached):
+    """Serve generation requests of pairwise client until interrupted"""
+    if port is None and os.path.exists(socket_path):
+        if connectable(socket_path):
+            raise click.UsageError(f"Server is already listening on {socket_path}.")
+        # Socket left by server which did not exit cleanly
+        os.remove(socket_path)
+    asyncio.run(run_server(socket_path, port, jobs, max_cached))
+
+
+async def run_server(socket_path, port, jobs, max_cached):
+    """
+    Listen on Unix socket or TCP port until SIGINT or SIGTERM is received
+    :param socket_path: Path of Unix socket
+    :param port: TCP port of localhost, Unix socket is used when not given
+    :param jobs: Number of processes generating configurations
+    :param max_cached: Maximal number of results kept in memory
+    """
+    loop = asyncio.get_running_loop()
+    stop = loop.create_future()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signal_number, lambda: stop.done() or stop.set_result(None))
+    # Workers ignore interrupt from terminal, server stops them once running generations end
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=signal.signal, initargs=(signal.SIGINT, signal.SIG_IGN)
+    ) as executor:
+        server = GenerationServer(executor, max_cached)
+        if port is None:
+            listener = await asyncio.start_unix_server(server.handle, socket_path, limit=REQUEST_LIMIT)
+            address = socket_path
+        else:
+            listener = await asyncio.start_server(server.handle, "127.0.0.1", port, limit=REQUEST_LIMIT)
+            address = f"127.0.0.1:{listener.sockets[0].getsockname()[1]}"
+        click.echo(f"Serving on {address}", err=True)
+        try:
+            async with listener:
+                await stop
+        finally:
+            if port is None and os.path.exists(socket_path):
+                os.remove(socket_path)
+
+
+def connectable(socket_path):
+    """
+    :param socket_path: Path of Unix socket
+    :return: True if server is listening on socket, False otherwise
+    """
+    with socket.socket(socket.AF_UNIX) as connection:
+        try:
+            connection.connect(socket_path)
+        except OSError:
+            return False
+    return True
@@ -0,0 +1,75 @@
+"""Sharding of generated configurations for pairwise tool"""
+import itertools
+from collections import Counter
+
+
+class Sharding:
+    """
+    Deterministic split of configurations into shards of balanced cost. Configurations are assigned
+    in order of generation, each one to shard where it covers the most pairs not covered by that shard yet,
+    out of shards which stay within capacity, so every shard covers as many pairs as possible on its own.
+    Capacity is average cost of shard plus the most expensive configuration, so configuration always fits
+    into the cheapest shard and no shard of configurations with the same cost exceeds average by whole configuration.
+    """
+
+    def __init__(self, rows, count, costs=None):
+        """
+        :param rows: Configurations as lists of values in kind order
+        :param count: Number of shards
+        :param costs: Cost of each configuration, every configuration costs 1 when not given
+        """
+        self.count = count
+        self.costs = list(costs) if costs is not None else [1] * len(rows)
+        self.assignment = []
+        self.loads = [0] * count
+        self.sizes = [0] * count
+        # Bitmask of shards covering each pair of value ids
+        self._covered = {}
+        capacity = sum(self.costs) / count + max(self.costs, default=0) * (count - 1) / count
+        capacity *= 1 + 1e-9
+        lookup = {}
+        for row, cost in zip(rows, self.costs):
+            ids = [lookup.setdefault((kind, type(value), value), len(lookup)) for kind, value in enumerate(row)]
+            pairs = list(itertools.combinations(sorted(ids), 2))
+            masks = Counter(self._covered.get(pair, 0) for pair in pairs)
+            # Shard covering the most new pairs, then the cheapest one, then the first one
+            *_, shard = max(
+                (sum(number for mask, number in masks.items() if not mask >> shard & 1), -self.loads[shard], -shard)
+                for shard in range(count)
+                if self.loads[shard] + cost <= capacity
+            )
+            shard = -shard
+            for pair in pairs:
+                self._covered[pair] = self._covered.get(pair, 0) | 1 << shard
+            self.assignment.append(shard)
+            self.loads[shard] += cost
+            self.sizes[shard] += 1
+
+    def shard(self, index):
+        """
+        :param index: Index of shard, starting from 0
+        :return: Indexes of configurations of shard in order of generation
+        """
+        return [row for row, shard in enumerate(self.assignment) if shard == index]
+
+    def pairs(self, index):
+        """
+        :param index: Index of shard, starting from 0
+        :return: Number of distinct pairs covered by configurations of shard
+        """
+        return sum(mask >> index & 1 for mask in self._covered.values())
+
+    def report(self):
+        """
+        :return: Lines with number of configurations, cost and covered pairs of each shard
+        """
+        total = len(self._covered)
+        lines = []
+        for index in range(self.count):
+            pairs = self.pairs(index)
+            share = pairs / total if total else 1
+            lines.append(
+                f"Shard {index + 1}/{self.count}: {self.sizes[index]} configurations, cost {self.loads[index]:g}, "
+                f"{pairs} of {total} pairs ({share:.1%})"
+            )
+        return lines
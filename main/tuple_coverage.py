@@ -0,0 +1,154 @@
+"""Tuple coverage class for pairwise tool"""
+import itertools
+import math
+
+
+# pylint: disable=too-many-instance-attributes
+class TupleCoverage:
+    """
+    Store of uncovered t-tuples of parameter ids. Every combination of t kinds keeps bitset of its tuples,
+    tuple is indexed by mixed-radix number whose digits are positions of its parameters within their kinds,
+    so memory is one bit per tuple and membership, removal and scoring are index computations.
+    """
+
+    def __init__(self, kind_params, strength, on_finished=None):
+        """
+        :param kind_params: Range of parameter ids of each kind, ids of one kind are consecutive
+        :param strength: Number of parameters in tuple
+        :param on_finished: Callback called with parameter id once all its tuples are covered
+        """
+        self.kind_params = kind_params
+        self.on_finished = on_finished
+        self.kind_of = [kind for kind, params in enumerate(kind_params) for _ in params]
+        self.combinations = list(itertools.combinations(range(len(kind_params)), strength))
+        self.kind_combinations = [[] for _ in kind_params]
+        self._bits = []
+        self._remaining = []
+        self._degree = [0] * len(self.kind_of)
+        for index, combination in enumerate(self.combinations):
+            size = math.prod(len(kind_params[kind]) for kind in combination)
+            bits = bytearray(b"\xff" * (size // 8 + 1))
+            bits[-1] = (1 << size % 8) - 1
+            self._bits.append(bits)
+            self._remaining.append(size)
+            for kind in combination:
+                self.kind_combinations[kind].append(index)
+                for param in kind_params[kind]:
+                    self._degree[param] += size // len(kind_params[kind])
+        self._count = sum(self._remaining)
+        if on_finished:
+            for param, degree in enumerate(self._degree):
+                if not degree:
+                    on_finished(param)
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        """
+        :return: Uncovered tuples as parameters in order of their kinds
+        """
+        for combination, kinds in enumerate(self.combinations):
+            if not self._remaining[combination]:
+                continue
+            for params in itertools.product(*(self.kind_params[kind] for kind in kinds)):
+                if self._is_uncovered(combination, self._index(combination, dict(zip(kinds, params)))):
+                    yield params
+
+    def degree(self, param):
+        """
+        :param param:
+        :return: Number of uncovered tuples containing given parameter
+        """
+        return self._degree[param]
+
+    def _index(self, combination, row):
+        """
+        :param combination: Index of kind combination
+        :param row: Configuration with all kinds of combination filled
+        :return: Index of tuple of configuration in bitset of combination
+        """
+        index = 0
+        for kind in self.combinations[combination]:
+            params = self.kind_params[kind]
+            index = index * len(params) + row[kind] - params.start
+        return index
+
+    def _is_uncovered(self, combination, index):
+        """
+        :return: True if tuple with given index of given combination is uncovered, False otherwise
+        """
+        return self._bits[combination][index >> 3] >> (index & 7) & 1
+
+    def cover_row(self, row):
+        """
+        Mark all tuples in (possibly partially filled) configuration as covered
+        :param row: Parameter ids of configuration, None for unfilled positions
+        """
+        for combination, kinds in enumerate(self.combinations):
+            if not self._remaining[combination] or any(row[kind] is None for kind in kinds):
+                continue
+            index = self._index(combination, row)
+            if not self._is_uncovered(combination, index):
+                continue
+            self._bits[combination][index >> 3] &= ~(1 << (index & 7))
+            self._remaining[combination] -= 1
+            self._count -= 1
+            for kind in kinds:
+                param = row[kind]
+                self._degree[param] -= 1
+                if not self._degree[param] and self.on_finished:
+                    self.on_finished(param)
+
+    def gains(self, row, kind):
+        """
+        :param row: Partially filled configuration, None for unfilled positions
+        :param kind: Kind which is going to be filled
+        :return: Number of uncovered tuples each parameter of kind would cover together with filled parameters
+        """
+        params = self.kind_params[kind]
+        gains = [0] * len(params)
+        for combination in self.kind_combinations[kind]:
+            kinds = self.combinations[combination]
+            if not self._remaining[combination] or any(row[other] is None for other in kinds if other != kind):
+                continue
+            # Index of tuple with first parameter of kind, other parameters of kind are stride apart
+            index, stride = 0, 0
+            for other in kinds:
+                size = len(self.kind_params[other])
+                index *= size
+                stride *= size
+                if other == kind:
+                    stride = 1
+                else:
+                    index += row[other] - self.kind_params[other].start
+            for position in range(len(params)):
+                gains[position] += self._is_uncovered(combination, index + position * stride)
+        return gains
+
+    def count_uncovered(self, row):
+        """
+        :param row: Configuration with all kinds filled
+        :return: Number of uncovered tuples in configuration
+        """
+        return sum(
+            self._is_uncovered(combination, self._index(combination, row))
+            for combination in range(len(self.combinations))
+            if self._remaining[combination]
+        )
+
+    def uncovered_tuples(self, param):
+        """
+        :param param:
+        :return: Generator of parameters of uncovered tuples containing given parameter
+        """
+        kind = self.kind_of[param]
+        for combination in self.kind_combinations[kind]:
+            if not self._remaining[combination]:
+                continue
+            kinds = self.combinations[combination]
+            columns = [[param] if other == kind else self.kind_params[other] for other in kinds]
+            for params in itertools.product(*columns):
+                row = dict(zip(kinds, params))
+                if self._is_uncovered(combination, self._index(combination, row)):
+                    yield params
@@ -0,0 +1,60 @@
+"""T-wise engine for pairwise tool"""
+import itertools
+
+from .pairwise import Pairwise
+from .tuple_coverage import TupleCoverage
+
+
+class TuplewisePairwise(Pairwise):  # pylint: disable=too-few-public-methods
+    """
+    Configurations generator covering all t-tuples of parameters of different kinds. Batch of candidate
+    configurations is seeded with uncovered tuples of main parameter and greedily filled kind by kind
+    with parameters covering most uncovered tuples, ties are broken by ratio of parameters. Candidate
+    covering most uncovered tuples is added.
+    """
+
+    batch_size = 4
+
+    def __init__(self, parameters, margin, seed=None, strength=3, compiled=None):
+        """
+        :param parameters: Loaded input file with parameters and optional weights
+        :param margin: Margin of weights
+        :param seed: Seed for random tie-breaks of equally good parameters
+        :param strength: Number of parameters in tuples which are covered
+        :param compiled: Compiled parameters of the same input file, they are compiled when not given
+        """
+        self.strength = strength
+        super().__init__(parameters, margin, seed, compiled)
+
+    def _generate_pairs(self):
+        """
+        :return: Coverage store with all possible tuples from given parameters
+        """
+        return TupleCoverage(self.model.kind_params, self.strength, self._param_finished)
+
+    def _generate_configuration(self):
+        """Generate next configuration"""
+        param = self._main_param(self._sorted_params(self._parameter_quantity()))
+        candidates = []
+        for uncovered in list(itertools.islice(self.pairs.uncovered_tuples(param), self.batch_size)) or [(param,)]:
+            configuration = [None] * len(self.model.kinds)
+            for tuple_param in uncovered:
+                configuration[self.model.kind_of[tuple_param]] = tuple_param
+            candidates.append(self._complete_configuration(configuration))
+        return self._add_configuration(max(candidates, key=self.pairs.count_uncovered), param)
+
+    def _complete_configuration(self, configuration):
+        """
+        :param configuration: Partially filled configuration, None for unfilled positions
+        :return: Configuration filled kind by kind with parameters allowed by constraints covering the most
+        uncovered tuples, parameters most missing to their ratio are preferred among them
+        """
+        for kind in self._kind_numerosity():
+            if configuration[kind] is None:
+                params = self.model.kind_params[kind]
+                gains = self.pairs.gains(configuration, kind)
+                scores = [
+                    (self._fits(configuration, param), gain, self._deficit(param)) for gain, param in zip(gains, params)
+                ]
+                configuration[kind] = params.start + scores.index(max(scores))
+        return tuple(configuration)
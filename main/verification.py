@@ -0,0 +1,294 @@
+"""Vectorised verification of existing configurations for pairwise tool"""
+import csv
+import itertools
+
+import numpy as np
+
+from .binary_suite import MAGIC, BinarySuite, InvalidSuite
+
+# Masks of the first 0 to 8 bytes of 64-bit little-endian word
+BYTE_MASKS = np.array([(1 << 8 * length) - 1 for length in range(9)], dtype=np.uint64)
+# Odd multiplier of polynomial hash which finds values of CSV suite among values of kinds
+HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+# Number of configurations of CSV suite encoded at once
+CHUNK = 2**14
+# Number of one-hot cells of configurations multiplied at once when pairs are counted by Gram product
+GRAM_CELLS = 2**22
+# Gram product is used when cells of Gram matrix are at most this times number of pairs of kinds, it multiplies
+# every cell for each configuration, but it does so much faster than bincount of one pair of kinds
+GRAM_RATIO = 100
+
+
+class SuiteVerification:
+    """
+    Coverage and ratios of existing configurations against parameters. Configurations are columns of parameter ids,
+    pairs of all kinds are counted at once by Gram product of one-hot configurations, other combinations of kinds
+    by one bincount of combined ids, so each pass over configurations is done by NumPy at once.
+    """
+
+    def __init__(self, pairwise, columns):
+        """
+        :param pairwise: Generator of parameters, its model, constraints and ratio requirements are used
+        :param columns: Columns of parameter ids in kind order, -1 for missing or unknown values
+        """
+        self.pairwise = pairwise
+        self.model = pairwise.model
+        self.columns = np.asarray(columns, dtype=np.int64).reshape(len(self.model.kinds), -1)
+        self.known = (self.columns >= 0).all(axis=0)
+        # Boolean index of configurations is column-major, rows of kinds are made contiguous for fast passes
+        ids = np.ascontiguousarray(self.columns[:, self.known])
+        sizes = [len(params) for params in self.model.kind_params]
+        # Number of configurations covering each combination of parameters of given kinds, in C order of their positions
+        combinations = list(itertools.combinations(range(len(sizes)), pairwise.strength))
+        if pairwise.strength == 2 and len(self.model) ** 2 <= GRAM_RATIO * len(combinations):
+            self.counts = self._pair_counts(ids, combinations)
+        else:
+            starts = np.array([params.start for params in self.model.kind_params])
+            positions = ids - starts[:, np.newaxis]
+            self.counts = {}
+            for kinds in combinations:
+                shape = tuple(sizes[kind] for kind in kinds)
+                index = np.ravel_multi_index(tuple(positions[kind] for kind in kinds), shape)
+                self.counts[kinds] = np.bincount(index, minlength=int(np.prod(shape)))
+        self.quantity = np.bincount(self.columns[self.columns >= 0], minlength=len(self.model))
+
+    def _pair_counts(self, ids, pairs):
+        """
+        :param ids: Rows of parameter ids of each kind of configurations with all values known
+        :param pairs: Pairs of kinds
+        :return: Number of configurations covering each pair of parameters of given kinds, in C order
+        of their positions
+        """
+        total = len(self.model)
+        gram = np.zeros((total, total), dtype=np.int64)
+        # Float products are exact, each chunk counts less than 2**24 configurations
+        step = max(1, GRAM_CELLS // total)
+        for start in range(0, ids.shape[1], step):
+            chunk = ids[:, start : start + step]
+            one_hot = np.zeros((chunk.shape[1], total), dtype=np.float32)
+            one_hot[np.arange(chunk.shape[1]), chunk] = 1
+            gram += (one_hot.T @ one_hot).astype(np.int64)
+        kind_params = self.model.kind_params
+        return {
+            (kind1, kind2): gram[
+                kind_params[kind1].start : kind_params[kind1].stop, kind_params[kind2].start : kind_params[kind2].stop
+            ].ravel()
+            for kind1, kind2 in pairs
+        }
+
+    def __len__(self):
+        return self.columns.shape[1]
+
+    def unknown(self):
+        """
+        :return: Indexes of configurations with missing or unknown values
+        """
+        return np.flatnonzero(~self.known).tolist()
+
+    def combinations(self, counts=None):
+        """
+        :param counts: Number of covering configurations, all combinations are returned when not given
+        :return: Combinations of parameters of different kinds and number of configurations covering them
+        """
+        for kinds, kind_counts in self.counts.items():
+            indexes = np.arange(len(kind_counts)) if counts is None else np.flatnonzero(kind_counts == counts)
+            shape = tuple(len(self.model.kind_params[kind]) for kind in kinds)
+            positions = np.unravel_index(indexes, shape)
+            params = np.stack(
+                [position + self.model.kind_params[kind].start for kind, position in zip(kinds, positions)]
+            )
+            for combination, count in zip(map(tuple, params.T.tolist()), kind_counts[indexes].tolist()):
+                yield combination, count
+
+    def uncovered(self):
+        """
+        :return: Combinations which are in no configuration, combinations impossible because of constraints
+        are left out
+        """
+        impossible = set(self.pairwise.impossible)
+        return [combination for combination, _ in self.combinations(0) if combination not in impossible]
+
+    def coverage(self):
+        """
+        :return: Number of combinations possible because of constraints, and the lowest and highest number
+        of configurations covering any of them
+        """
+        impossible = set(self.pairwise.impossible)
+        mask = {kinds: np.ones(len(counts), dtype=bool) for kinds, counts in self.counts.items()}
+        kind_of = self.model.kind_of
+        for combination in impossible:
+            kinds = tuple(kind_of[param] for param in combination)
+            shape = tuple(len(self.model.kind_params[kind]) for kind in kinds)
+            starts = tuple(self.model.kind_params[kind].start for kind in kinds)
+            mask[kinds][np.ravel_multi_index(tuple(np.subtract(combination, starts)), shape)] = False
+        counts = np.concatenate([counts[mask[kinds]] for kinds, counts in self.counts.items()] or [np.zeros(0, int)])
+        if not counts.size:
+            return 0, 0, 0
+        return len(counts), int(counts.min()), int(counts.max())
+
+    def divergences(self):
+        """
+        :return: KL divergence of each parameter with ratio requirement
+        """
+        return self.pairwise.divergences(self.quantity.tolist(), len(self))
+
+    def violations(self):
+        """
+        :return: Parameters whose ratio is not within margin
+        """
+        return self.pairwise.violations(self.quantity.tolist(), len(self))
+
+
+def read_suite(path, model):
+    """
+    :param path: Path of CSV or binary suite, values are matched by their string representation
+    :param model: Compiled parameters
+    :return: Columns of parameter ids in kind order, -1 for missing or unknown values
+    """
+    lookups = [{str(model.values[param]): param for param in params} for params in model.kind_params]
+    with open(path, "rb") as file:
+        binary = file.read(len(MAGIC)) == MAGIC
+    if binary:
+        return read_binary(path, model, lookups)
+    with open(path, "rb") as file:
+        data = file.read()
+    if b"\r" in data:
+        data = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+    header_end = data.find(b"\n") if b"\n" in data else len(data)
+    header = next(csv.reader([data[:header_end].decode("utf-8")]), [])
+    missing = [kind for kind in model.kinds if kind not in header]
+    if missing:
+        raise InvalidSuite(f"\nSuite {path} has no column of kinds {', '.join(missing)}.")
+    body = data[header_end + 1 :]
+    fields = split_fields(body, len(header))
+    if fields is not None:
+        # Suite without quoted values and with the same number of values in every configuration is encoded
+        # right from its bytes
+        index = ValueIndex([lookups[model.kinds.index(kind)] if kind in model.kinds else {} for kind in header])
+        buffer = body + bytes(8 * index.size)
+        words = np.ndarray((len(buffer) - 7,), dtype="<u8", buffer=buffer, strides=(1,))
+        starts, ends = fields
+        # Configurations are encoded in chunks, so bytes of chunk stay in cache while its values are read
+        ids = np.concatenate(
+            [
+                index.encode(words, starts[chunk], ends[chunk] - starts[chunk])
+                for chunk in map(slice, range(0, len(starts), CHUNK), range(CHUNK, len(starts) + CHUNK, CHUNK))
+            ]
+            or [np.zeros((0, len(header)), dtype=np.int64)]
+        )
+        return [np.ascontiguousarray(ids[:, header.index(kind)]) for kind in model.kinds]
+    # Short rows are filled with None, which is unknown value, empty rows are skipped
+    width = len(header)
+    rows = csv.reader(body.decode("utf-8").splitlines())
+    values = [value for row in rows if row for value in (row + [None] * width)[:width]]
+    return [
+        np.fromiter(map(lookup.get, values[header.index(kind) :: width], itertools.repeat(-1)), np.int64)
+        for kind, lookup in zip(model.kinds, lookups)
+    ]
+
+
+def split_fields(body, width):
+    """
+    :param body: Configurations of CSV suite as bytes, lines end with newline
+    :param width: Number of values in each configuration
+    :return: Start and end offsets of values as matrices with row for each configuration, None if suite has
+    quoted values, empty lines or configurations with another number of values
+    """
+    if b'"' in body:
+        return None
+    if body and not body.endswith(b"\n"):
+        body += b"\n"
+    buffer = np.frombuffer(body, dtype=np.uint8)
+    delimiters = np.flatnonzero((buffer == ord(",")) | (buffer == ord("\n")))
+    if len(delimiters) % width:
+        return None
+    ends = delimiters.reshape(-1, width)
+    if not ((buffer[ends[:, :-1]] == ord(",")).all() and (buffer[ends[:, -1]] == ord("\n")).all()):
+        return None
+    starts = np.concatenate(([0], delimiters + 1))[:-1].reshape(-1, width)
+    if (starts[:, 0] == ends[:, -1]).any():
+        return None
+    return starts, ends
+
+
+class ValueIndex:
+    """
+    Values of kinds in columns of CSV suite as zero-padded little-endian 64-bit words. Values of suite are read
+    as words right from bytes of suite and found by hash of their column and words, so they are never turned
+    into strings.
+    """
+
+    def __init__(self, lookups):
+        """
+        :param lookups: Parameter ids of string representations of values of kind in each column
+        """
+        keys = [
+            (column, value.encode(), param) for column, lookup in enumerate(lookups) for value, param in lookup.items()
+        ]
+        self.size = max([1] + [-(-len(key) // 8) for _, key, _ in keys])
+        self.columns = np.array([column for column, _, _ in keys], dtype=np.int64)
+        self.lengths = np.array([len(key) for _, key, _ in keys], dtype=np.int64)
+        self.params = np.array([param for _, _, param in keys], dtype=np.int64)
+        self.words = np.frombuffer(
+            b"".join(key.ljust(8 * self.size, b"\0") for _, key, _ in keys), dtype="<u8"
+        ).reshape(-1, self.size)
+        self.multiplier = HASH_MULTIPLIER
+        while len(np.unique(hashes := self._hash(self.columns, self.words))) < len(keys):
+            self.multiplier += 2
+        self.order = np.argsort(hashes)
+        self.hashes = hashes[self.order]
+
+    def _hash(self, columns, words):
+        """
+        :param columns: Columns of values
+        :param words: Words of values, the last axis
+        :return: Polynomial hash of column and words of each value
+        """
+        hashes = columns.astype(np.uint64)
+        for word in np.moveaxis(words, -1, 0):
+            hashes = hashes * np.uint64(self.multiplier) + word
+        return hashes
+
+    def encode(self, words, starts, lengths):
+        """
+        :param words: Words starting at every byte of suite, which is followed by zeros at least as long as words
+        of the longest value
+        :param starts: Start offsets of values, row for each configuration
+        :param lengths: Lengths of values, row for each configuration
+        :return: Parameter ids of values, row for each configuration, -1 for unknown values
+        """
+        # Bytes following value within its last word are cleared
+        values = np.stack(
+            [words[starts + 8 * word] & BYTE_MASKS[np.clip(lengths - 8 * word, 0, 8)] for word in range(self.size)],
+            axis=-1,
+        )
+        columns = np.broadcast_to(np.arange(starts.shape[1]), starts.shape)
+        found = np.searchsorted(self.hashes, self._hash(columns, values))
+        found = self.order[np.minimum(found, len(self.order) - 1)]
+        # Hash only finds candidate value, it has to be in the same column and have the same words and length
+        matched = (
+            (self.columns[found] == columns)
+            & (self.lengths[found] == lengths)
+            & (self.words[found] == values).all(axis=-1)
+        )
+        return np.where(matched, self.params[found], -1)
+
+
+def read_binary(path, model, lookups):
+    """
+    :param path: Path of binary suite
+    :param model: Compiled parameters
+    :param lookups: Parameter ids of string representations of values of each kind
+    :return: Columns of parameter ids in kind order, -1 for unknown values
+    """
+    with BinarySuite(path) as suite:
+        missing = [kind for kind in model.kinds if kind not in suite.kinds]
+        if missing:
+            raise InvalidSuite(f"\nSuite {path} has no column of kinds {', '.join(missing)}.")
+        columns = []
+        for kind, lookup in zip(model.kinds, lookups):
+            ids = np.array([lookup.get(str(value), -1) for value in suite.values[suite.kinds.index(kind)]] or [-1])
+            column = suite.column(kind)
+            columns.append(ids[np.frombuffer(column, dtype=column.format)] if len(suite) else ids[:0])
+            column.release()
+    return columns
@@ -0,0 +1,99 @@
+"""Verification of existing configurations against parameters of pairwise tool"""
+import csv
+import itertools
+
+import click
+
+from .api import InvalidOption, get_engine
+from .binary_suite import InvalidSuite
+from .parameters_check import ParametersCheck
+
+# Number of uncovered combinations and configurations with unknown values which are listed
+SHOWN = 20
+
+
+@click.command()
+@click.argument("parameters", type=click.File("r"))
+@click.argument("suite", type=click.Path(exists=True, dir_okay=False))
+@click.option("-m", "--margin", help="Margin of weights, default is 0.05", type=click.FLOAT)
+@click.option(
+    "--strength",
+    help="Number of parameters of different kinds whose combinations have to be covered, default is 2",
+    type=click.IntRange(min=2),
+    default=2,
+)
+@click.option(
+    "--pair-counts",
+    help="CSV output file with number of configurations covering each combination",
+    type=click.File("w"),
+)
+# pylint: disable=too-many-locals
+def verify(parameters, suite, margin, strength, pair_counts):
+    """
+    Verify that configurations of SUITE, CSV or binary file, cover all combinations of PARAMETERS
+    and meet their weights. Exit status is 1 when any combination is uncovered, any weight is not met
+    or any configuration has unknown value.
+    """
+    check = ParametersCheck(parameters)
+    check.check_parameters()
+    try:
+        # pylint: disable=import-outside-toplevel
+        from .verification import SuiteVerification, read_suite
+    except ImportError as e:
+        raise click.UsageError("Command verify requires numpy package to be installed.") from e
+    try:
+        pairwise = get_engine("python", strength, len(check.file["Parameters"]))(check.file, margin)
+    except InvalidOption as e:
+        raise click.UsageError(str(e)) from e
+    try:
+        verification = SuiteVerification(pairwise, read_suite(suite, pairwise.model))
+    except InvalidSuite as e:
+        raise click.ClickException(str(e).strip()) from e
+    name = "pairs" if strength == 2 else f"combinations of {strength} parameters"
+
+    unknown = verification.unknown()
+    if unknown:
+        click.echo(f"Configurations with missing or unknown values: {len(unknown)}")
+        click.echo(f"  {shown(index + 1 for index in unknown)}")
+    possible, lowest, highest = verification.coverage()
+    uncovered = verification.uncovered()
+    click.echo(f"Configurations: {len(verification)}")
+    click.echo(f"Covered {name}: {possible - len(uncovered)} of {possible}, covered {lowest} to {highest} times")
+    if uncovered:
+        click.echo(f"Uncovered {name}: {len(uncovered)}")
+        click.echo(f"  {shown(pairwise.model.label_combination(combination) for combination in uncovered)}")
+
+    divergences = verification.divergences()
+    violations = verification.violations()
+    for param in sorted(violations):
+        ratio = verification.quantity[param] / len(verification)
+        click.echo(
+            f"Ratio of {pairwise.model.label(param)} is not within margin: {ratio:.4f}, "
+            f"expected {pairwise.parameters_ratio[param]:.4f}, divergence {divergences[param]:.4f}"
+        )
+    maximal = max((abs(divergence) for divergence in divergences.values()), default=0)
+    click.echo(f"Maximal divergence: {maximal:.4f} (margin {pairwise.margin})")
+
+    if pair_counts:
+        writer = csv.writer(pair_counts)
+        writer.writerow(["combination", "count"])
+        writer.writerows(
+            (pairwise.model.label_combination(combination), count) for combination, count in verification.combinations()
+        )
+
+    problems = [
+        f"{len(uncovered)} uncovered {name}" if uncovered else None,
+        f"{len(violations)} ratios not within margin" if violations else None,
+        f"{len(unknown)} configurations with unknown values" if unknown else None,
+    ]
+    if any(problems):
+        raise click.ClickException(f"Suite has {', '.join(filter(None, problems))}.")
+
+
+def shown(items):
+    """
+    :param items: Items of listing
+    :return: The first items of listing joined by comma
+    """
+    items = list(itertools.islice(items, SHOWN + 1))
+    return ", ".join(map(str, items[:SHOWN])) + (", ..." if len(items) > SHOWN else "")
@@ -1,4 +1,5 @@
 """Conftest for pairwise tests"""
+import itertools
 import json
 import os
 import string
@@ -7,6 +8,12 @@ from random import choice
 import pytest
 
 
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Keep cached configurations of tested runs out of user cache"""
+    monkeypatch.setenv("PAIRWISE_CACHE_DIR", str(tmp_path / "cache"))
+
+
 @pytest.fixture()
 def create_file(request):
     """Create input file from given parameters"""
@@ -19,3 +26,17 @@ def create_file(request):
         return filename
 
     return _create_file
+
+
+@pytest.fixture()
+def assert_covered():
+    """Assert that rows of generated suite cover exactly the combinations of parameters allowed by constraints"""
+
+    def _assert_covered(rows, parameters, forbidden=(), strength=2):
+        values = [[str(value) for value in kind] for kind in parameters.values()]
+        for kinds in itertools.combinations(range(len(values)), strength):
+            covered = {tuple(str(row[kind]) for kind in kinds) for row in rows}
+            allowed = set(itertools.product(*(values[kind] for kind in kinds))) - set(forbidden)
+            assert covered == allowed
+
+    return _assert_covered
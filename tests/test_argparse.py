@@ -1,5 +1,6 @@
 """Test for argument parsing of pairwise tools"""
 
+import json
 import os
 
 import pytest
@@ -33,6 +34,34 @@ def negative_weight(create_file):
     return create_file(data)
 
 
+@pytest.fixture()
+def duplicate_parameter(create_file):
+    """Creates file with parameter present twice in one kind"""
+    data = {"Parameters": {"P1": ["a", "b"], "P2": [1, 2, 1], "P3": ["x", "y"]}}
+    return create_file(data)
+
+
+@pytest.fixture()
+def invalid_constraint(create_file):
+    """Creates file with constraint of nonexistent parameter kind"""
+    data = {"Parameters": {"P1": ["a", "b"], "P2": [1, 2], "P3": ["x", "y"]}, "Constraints": [{"P1": "a", "P9": 1}]}
+    return create_file(data)
+
+
+@pytest.fixture()
+def invalid_structure(create_file):
+    """Creates file with parameters of kind which are not list"""
+    data = {"Parameters": {"P1": ["a", "b"], "P2": {"x": 1}}}
+    return create_file(data)
+
+
+@pytest.fixture()
+def negative_cost(create_file):
+    """Creates file with negative parameter cost"""
+    data = {"Parameters": {"P1": ["a", "b"], "P2": [1, 2], "P3": ["x", "y"]}, "Costs": {"x": -3}}
+    return create_file(data)
+
+
 @pytest.fixture()
 def not_file():
     """Returns filename that doesn't exist"""
@@ -59,6 +88,10 @@ def test_valid_parameters(capfd, valid_parameters):
         ("empty_list", "List of parameters for P1 is empty"),
         ("invalid_weight", "Parameter 'invalid' doesn't exists."),
         ("negative_weight", "Weight for parameter 'a' is negative."),
+        ("duplicate_parameter", "Parameters [1] are present more than once in P2."),
+        ("invalid_constraint", "uses nonexistent parameter kind 'P9'"),
+        ("negative_cost", "Cost for parameter 'x' has to be non-negative number."),
+        ("invalid_structure", "Parameters have to be object of lists of parameters of each kind."),
         ("not_file", "Error: Invalid value for 'PARAMETERS': 'not_file.json': No such file or directory"),
     ],
 )
@@ -75,6 +108,7 @@ def test_invalid_parameters(request, capfd, data, error):
     [
         ("--invalid", "Error: No such option: --invalid"),
         ("--margin invalid", "Error: Invalid value for '-m' / '--margin': 'invalid' is not a valid float."),
+        ("--format binary", "Error: Option --format binary requires --output."),
     ],
 )
 def test_invalid_option(capfd, valid_parameters, option, error):
@@ -82,3 +116,21 @@ def test_invalid_option(capfd, valid_parameters, option, error):
     os.system(f"pipenv run pairwise {option} {valid_parameters}")
     capture = capfd.readouterr()
     assert error in capture.err
+
+
+def test_commands(capfd):
+    """Test that help of pairwise tool lists all commands"""
+    os.system("pipenv run pairwise --help")
+    capture = capfd.readouterr()
+    for command in ("batch", "client", "generate", "serve", "verify"):
+        assert f"  {command} " in capture.out
+
+
+def test_file_named_as_command(capfd, request):
+    """Test that parameter file named as command is generated by generate command"""
+    with open("verify", "w", encoding="utf-8") as outfile:
+        json.dump({"Parameters": {"P1": ["a", "b"], "P2": [1, 2]}}, outfile)
+    request.addfinalizer(lambda: os.remove("verify"))
+    os.system("pipenv run pairwise generate --no-cache verify")
+    capture = capfd.readouterr()
+    assert len(capture.out.splitlines()) == 4
@@ -1,9 +1,19 @@
 """Test for pairwise tool"""
 
+import ast
+import itertools
+import json
 import os
+import socket
+import subprocess
+import time
+from collections import Counter
 
 import pytest
 
+from main.api import generate_with_warnings
+from main.binary_suite import BinarySuite
+
 
 @pytest.fixture()
 def input_file(create_file):
@@ -26,3 +36,385 @@ def test_output_to_csv(capfd, input_file, request):
     capture = capfd.readouterr()
     assert "1: ['a', 2, 'y']\n2: ['a', 1, 'x']\n3: ['b', 1, 'y']\n4: ['b', 2, 'x']\n" == capture.out
     assert os.path.isfile("out.csv")
+
+
+def test_output_csv_to_stdout(capfd, input_file):
+    """Test output of csv to stdout"""
+    os.system(f"pipenv run pairwise --output - {input_file}")
+    capture = capfd.readouterr()
+    assert "P1,P2,P3\na,2,y\na,1,x\nb,1,y\nb,2,x\n" == capture.out.replace("\r\n", "\n")
+
+
+def test_seed_suite(capfd, create_file, assert_covered, request):
+    """Test that existing configurations are extended after new parameter is added"""
+    request.addfinalizer(lambda: os.remove("seed.csv"))
+    parameters = {"P1": ["a", "b"], "P2": [1, 2], "P3": ["x", "y"]}
+    os.system(f"pipenv run pairwise --output seed.csv {create_file({'Parameters': parameters})}")
+    seeded = capfd.readouterr().out.splitlines()
+    parameters["P1"].append("c")
+    os.system(f"pipenv run pairwise --seed-suite seed.csv {create_file({'Parameters': parameters})}")
+    lines = capfd.readouterr().out.splitlines()
+    assert lines[: len(seeded)] == seeded
+    rows = [ast.literal_eval(line.split(": ", 1)[1]) for line in lines]
+    assert_covered(rows, parameters)
+
+
+def test_seed_suite_constraints(capfd, create_file, assert_covered, tmp_path):
+    """Test that configurations of seed suite breaking constraints are left out with warning"""
+    parameters = {"P1": ["a", "b"], "P2": [1, 2], "P3": ["x", "y"]}
+    seed = tmp_path / "seed.csv"
+    seed.write_text("P1,P2,P3\na,1,x\na,2,y\nb,1,y\n", encoding="utf-8")
+    filename = create_file({"Parameters": parameters, "Constraints": [{"P1": "a", "P2": 1}]})
+    os.system(f"pipenv run pairwise --no-cache --seed-suite {seed} {filename}")
+    capture = capfd.readouterr()
+    rows = [ast.literal_eval(line.split(": ", 1)[1]) for line in capture.out.splitlines()]
+    assert rows[:2] == [["a", 2, "y"], ["b", 1, "y"]]
+    assert "1 configurations of seed suite break constraints and were left out" in capture.err
+    assert_covered(rows, parameters, forbidden=[("a", "1")])
+
+
+def test_seed_suite_new_kind():
+    """Test that values of new kind are spread over seed suite by their ratio, so no configurations are added"""
+    parameters = {"P1": list(range(8)), "P2": list(range(8)), "P3": list(range(4))}
+    seed = [dict(zip(parameters, row)) for row in itertools.product(*parameters.values())]
+    parameters["P4"] = ["x", "y", "z"]
+    rows, _ = generate_with_warnings({"Parameters": parameters}, margin=0.05, seed_configurations=seed)
+    assert len(rows) == len(seed)
+    assert sorted(Counter(row["P4"] for row in rows).values()) == [85, 85, 86]
+
+
+def test_seed_suite_skewed():
+    """Test that skewed seed suite is balanced by the smallest number of configurations meeting weights"""
+    parameters = {"P1": list(range(4)), "P2": list(range(4)), "P3": list(range(4)), "P4": list(range(4))}
+    seed = [dict(zip(parameters, row)) for row in itertools.product(*parameters.values())]
+    for index, configuration in enumerate(seed):
+        configuration["P5"] = {1: "y", 2: "z"}.get(index % 32, "x")
+    parameters["P5"] = ["x", "y", "z"]
+    rows, messages = generate_with_warnings({"Parameters": parameters}, margin=0.05, seed_configurations=seed)
+    assert not messages
+    assert len(rows) == 632
+    assert Counter(row["P5"] for row in rows) == {"x": 240, "y": 196, "z": 196}
+
+
+def test_cache(capfd, input_file, tmp_path):
+    """Test that configurations are loaded from cache by the next run"""
+    os.system(f"pipenv run pairwise --cache-dir {tmp_path} --cache-info --count {input_file}")
+    miss = capfd.readouterr()
+    os.system(f"pipenv run pairwise --cache-dir {tmp_path} --cache-info --count {input_file}")
+    hit = capfd.readouterr()
+    assert "Cache miss" in miss.err
+    assert "Cache hit" in hit.err
+    assert miss.out == hit.out
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_cache_key_order(capfd, create_file, tmp_path):
+    """Test that the same model with constraints and costs in other order is loaded from cache"""
+    parameters = {"P1": ["a", "b", "c"], "P2": [1, 2], "P3": ["x", "y"]}
+    constraints = [{"P1": "a", "P2": 1}, {"P3": "y", "P1": ["b", "c"]}]
+    first = create_file({"Parameters": parameters, "Constraints": constraints, "Costs": {"a": 2, "x": 1}})
+    second = create_file({"Costs": {"x": 1, "a": 2}, "Constraints": constraints[::-1], "Parameters": parameters})
+    os.system(f"pipenv run pairwise --cache-dir {tmp_path} --cache-info {first}")
+    miss = capfd.readouterr()
+    os.system(f"pipenv run pairwise --cache-dir {tmp_path} --cache-info {second}")
+    hit = capfd.readouterr()
+    assert "Cache miss" in miss.err
+    assert "Cache hit" in hit.err
+    assert miss.out == hit.out
+
+
+def test_stats_json(capfd, input_file, request):
+    """Test generation statistics output to json file"""
+    request.addfinalizer(lambda: os.remove("stats.json"))
+    os.system(f"pipenv run pairwise --profile --stats-json stats.json {input_file}")
+    capture = capfd.readouterr()
+    assert "1: ['a', 2, 'y']\n2: ['a', 1, 'x']\n3: ['b', 1, 'y']\n4: ['b', 2, 'x']\n" == capture.out
+    assert "Generated 4 configurations" in capture.err
+    with open("stats.json", encoding="utf-8") as stats_file:
+        stats = json.load(stats_file)
+    assert stats["configurations"] == 4
+    assert stats["records"][-1]["uncovered_pairs"] == 0
+    assert sum(stats["branches"].values()) == 4
+
+
+def test_same_values_in_more_kinds(capfd, create_file):
+    """Test that the same value can be used by more parameter kinds"""
+    filename = create_file({"Parameters": {"P1": [True, False], "P2": [True, False], "P3": ["x", "y"]}})
+    os.system(f"pipenv run pairwise --count {filename}")
+    capture = capfd.readouterr()
+    assert "1: [True, False, 'y']\n2: [True, True, 'x']\n3: [False, True, 'y']\n4: [False, False, 'x']\n" in capture.out
+    assert "('P1=True', 2)" in capture.out
+    assert "('P2=False', 2)" in capture.out
+
+
+def test_numpy_engine(capfd, create_file, assert_covered):
+    """Test that numpy engine covers all pairs"""
+    parameters = {"P1": ["a", "b", "c"], "P2": [1, 2, 3], "P3": ["x", "y"], "P4": ["u", "v"]}
+    filename = create_file({"Parameters": parameters})
+    os.system(f"pipenv run pairwise --engine numpy {filename}")
+    capture = capfd.readouterr()
+    rows = [ast.literal_eval(line.split(": ", 1)[1]) for line in capture.out.splitlines()]
+    assert_covered(rows, parameters)
+
+
+def test_numpy_engine_constraints(capfd, create_file, assert_covered):
+    """Test that numpy engine covers all pairs allowed by constraints"""
+    parameters = {"K0": ["a0", "a1"], "K1": ["b0", "b1", "b2"], "K2": ["c0", "c1", "c2"], "K3": ["d0", "d1"]}
+    constraints = [{"K3": "d0", "K1": "b2"}, {"K1": "b1", "K0": "a1"}]
+    filename = create_file(
+        {"Parameters": parameters, "Weights": {"a0": 0, "c2": 2, "c0": 1}, "Constraints": constraints}
+    )
+    os.system(f"pipenv run pairwise --no-cache --engine numpy {filename}")
+    capture = capfd.readouterr()
+    rows = [ast.literal_eval(line.split(": ", 1)[1]) for line in capture.out.splitlines()]
+    forbidden = {("b2", "d0"), ("a1", "b1")}
+    assert_covered(rows, parameters, forbidden)
+    assert "are not covered" not in capture.err
+
+
+def test_strength(capfd, create_file, assert_covered):
+    """Test that all triplets are covered with strength 3"""
+    parameters = {"P1": ["a", "b", "c"], "P2": [1, 2], "P3": ["x", "y"], "P4": ["u", "v", "w"]}
+    filename = create_file({"Parameters": parameters})
+    os.system(f"pipenv run pairwise --strength 3 {filename}")
+    capture = capfd.readouterr()
+    rows = [ast.literal_eval(line.split(": ", 1)[1]) for line in capture.out.splitlines()]
+    assert_covered(rows, parameters, strength=3)
+
+
+def test_restarts(capfd, create_file, assert_covered):
+    """Test that parallel restarts cover all pairs and are reproducible with seed"""
+    parameters = {"P1": ["a", "b", "c"], "P2": [1, 2, 3], "P3": ["x", "y"], "P4": ["u", "v"]}
+    filename = create_file({"Parameters": parameters})
+    os.system(f"pipenv run pairwise {filename}")
+    single = capfd.readouterr().out.splitlines()
+    outputs = []
+    for _ in range(2):
+        os.system(f"pipenv run pairwise --restarts 4 --jobs 2 --seed 1 {filename}")
+        outputs.append(capfd.readouterr().out)
+    assert outputs[0] == outputs[1]
+    rows = [ast.literal_eval(line.split(": ", 1)[1]) for line in outputs[0].splitlines()]
+    assert len(rows) <= len(single)
+    assert_covered(rows, parameters)
+
+
+def test_constraints(capfd, create_file, assert_covered):
+    """Test that forbidden pairs are never generated and all other pairs are covered"""
+    parameters = {"OS": ["Linux", "Windows", "macOS"], "Browser": ["Firefox", "Edge", "Safari"], "FS": ["ext4", "NTFS"]}
+    constraints = [{"OS": "Linux", "Browser": "Edge"}, {"if": {"Browser": "Safari"}, "then": {"OS": "macOS"}}]
+    filename = create_file({"Parameters": parameters, "Constraints": constraints})
+    os.system(f"pipenv run pairwise {filename}")
+    capture = capfd.readouterr()
+    rows = [ast.literal_eval(line.split(": ", 1)[1]) for line in capture.out.splitlines()]
+    forbidden = {("Linux", "Edge"), ("Linux", "Safari"), ("Windows", "Safari")}
+    assert_covered(rows, parameters, forbidden)
+    assert "impossible to cover" not in capture.err
+
+
+def test_batch(capfd, tmp_path):
+    """Test that batch writes configurations of every valid parameter file and reports invalid ones"""
+    parameters = {"P1": ["a", "b"], "P2": [1, 2], "P3": ["x", "y"]}
+    (tmp_path / "valid.json").write_text(json.dumps({"Parameters": parameters}), encoding="utf-8")
+    (tmp_path / "empty.json").write_text(json.dumps({"Parameters": {"P1": []}}), encoding="utf-8")
+    (tmp_path / "list.json").write_text(json.dumps({"Parameters": ["a", "b"]}), encoding="utf-8")
+    constraint = {"Parameters": parameters, "Constraints": [{"P1": {"a": 1}}]}
+    (tmp_path / "constraint.json").write_text(json.dumps(constraint), encoding="utf-8")
+    os.system(f"pipenv run pairwise batch {tmp_path} --jobs 2 --output-dir {tmp_path / 'out'}")
+    capture = capfd.readouterr()
+    assert "valid.json: 4 configurations written to" in capture.out
+    assert "empty.json: Error: List of parameters for P1 is empty." in capture.err
+    assert "list.json: Error: Parameters have to be object of lists of parameters of each kind." in capture.err
+    assert "constraint.json: Error: Constraint {'P1': {'a': 1}} has to contain parameter or list" in capture.err
+    assert "3 of 4 parameter files failed" in capture.err
+    output = (tmp_path / "out" / "valid.csv").read_text(encoding="utf-8")
+    assert "P1,P2,P3\na,2,y\na,1,x\nb,1,y\nb,2,x\n" == output.replace("\r\n", "\n")
+    assert not (tmp_path / "out" / "empty.csv").exists()
+
+
+def test_batch_same_names(capfd, tmp_path):
+    """Test that parameter files of the same name from different directories keep their paths in output directory"""
+    for directory, parameters in (("first", {"P1": ["a", "b"], "P2": [1, 2]}), ("second", {"P3": ["x", "y"]})):
+        (tmp_path / "in" / directory).mkdir(parents=True)
+        parameters["P4"] = [True, False]
+        data = json.dumps({"Parameters": parameters})
+        (tmp_path / "in" / directory / "model.json").write_text(data, encoding="utf-8")
+    os.system(f"pipenv run pairwise batch '{tmp_path / 'in' / '**' / '*.json'}' --output-dir {tmp_path / 'out'}")
+    capfd.readouterr()
+    assert (tmp_path / "out" / "first" / "model.csv").read_text(encoding="utf-8").startswith("P1,P2,P4")
+    assert (tmp_path / "out" / "second" / "model.csv").read_text(encoding="utf-8").startswith("P3,P4")
+
+
+def test_serve(capfd, input_file, tmp_path):
+    """Test that client receives the same configurations from server as generated directly"""
+    socket_path = tmp_path / "pairwise.sock"
+    with subprocess.Popen(
+        ["pipenv", "run", "pairwise", "serve", "--socket", str(socket_path), "--jobs", "1"]
+    ) as server:
+        for _ in range(100):
+            if socket_path.exists():
+                break
+            time.sleep(0.1)
+        os.system(f"pipenv run pairwise client --socket {socket_path} {input_file}")
+        first = capfd.readouterr()
+        os.system(f"pipenv run pairwise client --socket {socket_path} --output - {input_file}")
+        second = capfd.readouterr()
+        # Parameters compiled for the first request are reused by request with other options
+        os.system(f"pipenv run pairwise client --socket {socket_path} --strength 3 {input_file}")
+        third = capfd.readouterr()
+        server.terminate()
+    os.system(f"pipenv run pairwise --no-cache --strength 3 {input_file}")
+    assert capfd.readouterr().out == third.out
+    assert "1: ['a', 2, 'y']\n2: ['a', 1, 'x']\n3: ['b', 1, 'y']\n4: ['b', 2, 'x']\n" == first.out
+    assert "P1,P2,P3\na,2,y\na,1,x\nb,1,y\nb,2,x\n" == second.out.replace("\r\n", "\n")
+    assert not socket_path.exists()
+
+
+def test_serve_invalid_options(tmp_path):
+    """Test that server answers request with malformed options by error and keeps connection usable"""
+    socket_path = tmp_path / "pairwise.sock"
+    parameters = {"Parameters": {"P1": ["a", "b"], "P2": [1, 2], "P3": ["x", "y"]}}
+    with subprocess.Popen(
+        ["pipenv", "run", "pairwise", "serve", "--socket", str(socket_path), "--jobs", "1"]
+    ) as server:
+        for _ in range(100):
+            if socket_path.exists():
+                break
+            time.sleep(0.1)
+        with socket.socket(socket.AF_UNIX) as connection:
+            connection.settimeout(10)
+            connection.connect(str(socket_path))
+            with connection.makefile("rwb") as stream:
+                responses = []
+                for options in ({"margin": "x"}, {"strength": "3"}, {}):
+                    stream.write(json.dumps({"parameters": parameters, **options}).encode() + b"\n")
+                    stream.flush()
+                    responses.append(json.loads(stream.readline()))
+        server.terminate()
+    assert "Margin" in responses[0]["error"]
+    assert "Strength" in responses[1]["error"]
+    assert len(responses[2]["configurations"]) == 4
+
+
+def test_binary_format(input_file, tmp_path):
+    """Test that binary suite contains the same configurations as CSV output"""
+    os.system(f"pipenv run pairwise --no-cache --format binary --output {tmp_path / 'suite.bin'} {input_file}")
+    with BinarySuite(str(tmp_path / "suite.bin")) as suite:
+        assert suite.kinds == ["P1", "P2", "P3"]
+        assert list(suite) == [
+            {"P1": "a", "P2": 2, "P3": "y"},
+            {"P1": "a", "P2": 1, "P3": "x"},
+            {"P1": "b", "P2": 1, "P3": "y"},
+            {"P1": "b", "P2": 2, "P3": "x"},
+        ]
+        column = suite.column("P2", 1, 3)
+        assert suite.decode("P2", column) == [1, 1]
+        column.release()
+
+
+def test_shard(capfd, input_file):
+    """Test that shards split all configurations evenly and report their pair coverage"""
+    shards = []
+    for index in (1, 2):
+        os.system(f"pipenv run pairwise --shard {index}/2 --output - {input_file}")
+        capture = capfd.readouterr()
+        shards.append(capture.out.replace("\r\n", "\n").splitlines()[1:])
+    assert "Shard 1/2: 2 configurations, cost 2, 6 of 12 pairs (50.0%)" in capture.err
+    assert sorted(shards[0] + shards[1]) == sorted(["a,2,y", "a,1,x", "b,1,y", "b,2,x"])
+    assert len(shards[0]) == len(shards[1]) == 2
+
+
+def test_costs(capfd, create_file):
+    """Test that total cost of configurations is reported and expensive value is not used more than needed"""
+    parameters = {"Disk": ["encrypted", "plain"], "P1": ["a", "b", "c"], "P2": ["x", "y", "z"], "P3": [1, 2]}
+    filename = create_file({"Parameters": parameters, "Costs": {"encrypted": 40, "plain": 3}})
+    os.system(f"pipenv run pairwise --margin 0.2 --output - {filename}")
+    capture = capfd.readouterr()
+    rows = capture.out.replace("\r\n", "\n").splitlines()[1:]
+    encrypted = sum(row.startswith("encrypted,") for row in rows)
+    assert f"Total cost of {len(rows)} configurations: {40 * encrypted + 3 * (len(rows) - encrypted)}" in capture.err
+    assert encrypted < len(rows) - encrypted
+
+
+def test_minimise(capfd, create_file, assert_covered):
+    """Test that minimisation removes configurations and keeps all pairs covered"""
+    parameters = {"P1": ["a", "b", "c"], "P2": ["d", "e", "f"], "P3": [1, 2, 3, 4], "P4": [5, 6, 7, 8]}
+    filename = create_file({"Parameters": parameters})
+    os.system(f"pipenv run pairwise --minimise --no-cache --output - {filename}")
+    capture = capfd.readouterr()
+    rows = [row.split(",") for row in capture.out.replace("\r\n", "\n").splitlines()[1:]]
+    assert "Minimisation removed 6 of 22 configurations" in capture.err
+    assert len(rows) == 16
+    assert_covered(rows, parameters)
+
+    os.system(f"pipenv run pairwise --minimise --profile --no-cache --output - {filename}")
+    capture = capfd.readouterr()
+    assert "Generated 22 configurations" in capture.err
+    assert [line.split()[1] for line in capture.err.splitlines() if line.startswith("append ")] == ["22"]
+
+
+def test_verify(capfd, input_file, tmp_path):
+    """Test that verification reports uncovered pairs of suite and fails only when some are uncovered"""
+    suite = tmp_path / "suite.csv"
+    suite.write_text("P1,P2,P3\na,2,y\na,1,x\nb,1,y\nb,2,x\n", encoding="utf-8")
+    assert os.system(f"pipenv run pairwise verify {input_file} {suite}") == 0
+    assert "Covered pairs: 12 of 12, covered 1 to 1 times" in capfd.readouterr().out
+    suite.write_text("P1,P2,P3\na,2,y\na,1,x\nb,1,y\n", encoding="utf-8")
+    assert os.system(f"pipenv run pairwise verify {input_file} {suite}") != 0
+    capture = capfd.readouterr()
+    assert "Uncovered pairs: 3\n  (b, 2), (b, x), (2, x)" in capture.out
+    assert "Suite has 3 uncovered pairs" in capture.err
+
+
+def test_verify_read_suite(tmp_path):
+    """Test that suite read from its bytes has the same values as suite with quoted values read by CSV reader"""
+    pytest.importorskip("numpy")
+    # pylint: disable=import-outside-toplevel
+    from main.parameters_model import ParametersModel
+    from main.verification import read_suite
+
+    model = ParametersModel({"Parameters": {"P1": ["a", "long value of P1"], "P2": [1, 2.5], "P3": ["x", ""]}})
+    plain = tmp_path / "plain.csv"
+    plain.write_bytes(b"P3,P1,P2\r\nx,long value of P1,2.5\r\n,a,1\r\ny,a,2\r\nx,long value,1")
+    quoted = tmp_path / "quoted.csv"
+    quoted.write_text('P3,P1,P2\nx,"long value of P1",2.5\n,a,1\ny,a,2\nx,long value,1\n', encoding="utf-8")
+    expected = [[1, 0, 0, -1], [3, 2, -1, 2], [4, 5, -1, 4]]
+    assert [column.tolist() for column in read_suite(plain, model)] == expected
+    assert [column.tolist() for column in read_suite(quoted, model)] == expected
+
+
+def test_budget(capfd, create_file, assert_covered):
+    """Test that generation stops once budget runs out and all pairs are covered regardless of it"""
+    parameters = {"A": ["a1", "a2", "a3"], "B": ["b1", "b2", "b3"], "C": ["c1", "c2", "c3"], "D": ["d1", "d2", "d3"]}
+    filename = create_file({"Parameters": parameters, "Weights": {"a1": 3, "b1": 2}})
+    os.system(f"pipenv run pairwise --max-configurations 14 --output - {filename}")
+    capture = capfd.readouterr()
+    rows = [row.split(",") for row in capture.out.replace("\r\n", "\n").splitlines()[1:]]
+    assert len(rows) == 14
+    assert "Generation budget ran out after 14 configurations, maximal divergence is" in capture.err
+    assert_covered(rows, parameters)
+
+    os.system(f"pipenv run pairwise --time-budget 0 --output - {filename}")
+    capture = capfd.readouterr()
+    rows = [row.split(",") for row in capture.out.replace("\r\n", "\n").splitlines()[1:]]
+    assert_covered(rows, parameters)
+
+
+@pytest.mark.parametrize("engine", ["python", "numpy"])
+def test_same_as_api(capfd, create_file, engine):
+    """Test that command line without budget generates the same configurations and warnings as library"""
+    parameters = {
+        "K0": ["v0_0", "v0_1", "v0_2"],
+        "K1": ["v1_0", "v1_1"],
+        "K2": ["v2_0", "v2_1"],
+        "K3": ["v3_0", "v3_1"],
+    }
+    data = {"Parameters": parameters, "Constraints": [{"K0": "v0_2", "K3": "v3_1"}], "Weights": {"v3_1": 2}}
+    filename = create_file(data)
+    os.system(f"pipenv run pairwise --no-cache --engine {engine} --output - {filename}")
+    capture = capfd.readouterr()
+    configurations, messages = generate_with_warnings(data, engine=engine)
+    rows = [row.split(",") for row in capture.out.replace("\r\n", "\n").splitlines()[1:]]
+    assert rows == [list(configuration.values()) for configuration in configurations]
+    assert messages
+    for message in messages:
+        assert message in capture.err
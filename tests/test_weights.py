@@ -1,5 +1,6 @@
 """Tests for pairwise weights"""
 
+import ast
 import os
 
 
@@ -30,3 +31,34 @@ def test_weight(capfd, create_file):
     os.system(f"pipenv run pairwise --count --margin 0 {filename}")
     capture = capfd.readouterr()
     assert "('e', 4)" in capture.out
+    assert "Weights of parameters a (2), b (1), c (1), d (1) can not be met within margin 0" in capture.err
+
+
+def test_unmet_weight(capfd, create_file):
+    """Test report of weights which cannot be met in any suite"""
+    data = {"Parameters": {"P1": ["a", "b"], "P2": [1, 2], "P3": ["x", "y"]}, "Weights": {"a": 10}}
+    filename = create_file(data)
+    os.system(f"pipenv run pairwise {filename}")
+    capture = capfd.readouterr()
+    assert "Weights of parameters a (10), b (1) can not be met within margin 0.05" in capture.err
+
+
+def test_weight_constraints(capfd, create_file):
+    """Test that weights are met in configurations allowed by constraints"""
+    parameters = {f"P{kind}": [f"{value}{kind}" for value in "abc"] for kind in range(10)}
+    constraints = [
+        {"P0": "a0", "P1": "a1"},
+        {"P2": "b2", "P3": "a3"},
+        {"P0": "a0", "P4": "c4"},
+        {"P5": "b5", "P6": "b6"},
+    ]
+    data = {"Parameters": parameters, "Constraints": constraints, "Weights": {"a0": 3, "b5": 2}}
+    filename = create_file(data)
+    os.system(f"pipenv run pairwise --count {filename}")
+    capture = capfd.readouterr()
+    rows = [ast.literal_eval(line.split(": ", 1)[1]) for line in capture.out.splitlines() if line[:1].isdigit()]
+    assert rows
+    assert not any({"a0", "a1"} <= set(row) or {"b5", "b6"} <= set(row) for row in rows)
+    assert sum("a0" in row for row in rows) > sum("b0" in row for row in rows)
+    assert "can not be met" not in capture.err
+    assert "No more unique configuration" not in capture.err